@@ -0,0 +1,390 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from asyncfetch import AsyncEngine, run_steps
+#   engine = AsyncEngine(limit=DEFAULT_LIMIT, per_host=None, per_hub=None)
+#       raises ImportError if aiohttp isn't installed
+#   results = engine.run(func, jobs, sink=None)
+#       await func(engine, *args) for all args in jobs, at most limit jobs
+#       concurrently, sink(args, result) in job order, without sink the list
+#       of results is returned
+#
+# Within func
+#   api_server = await engine.api_server(api)   MyenergiAPI api, director lookup if not cached
+#   r = await engine.get_api(api, path, headers={...})
+#       same as api.get_api(), Response with status_code, headers, content,
+#       text, size (bytes received)
+#   records = await run_steps(steps, fetch)     see windowplanner.run_steps(), async fetch
+#   await engine.sleep(delay)
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       asyncio engine, aiohttp client with connection limits per API
+#       server, digest auth, rate limits, retries and circuit breaker of the
+#       request scheduler, director lookups through the MyenergiAPI cache
+
+import typing
+import zlib
+from collections import deque
+from itertools import islice
+from urllib.parse import urlsplit
+
+# Local modules
+from verbose import verbose, stats
+from myenergiapi import MyenergiAPI
+from requestscheduler import scheduler, TransientError, RETRY_STATUS
+
+VERSION = "0.1 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "asyncfetch"
+
+
+DEFAULT_LIMIT = 4
+
+REDIRECT_STATUS = (301, 302, 303, 307, 308)
+
+# aiohttp is optional, asyncio and aiohttp are imported on first use, see
+# _import_aiohttp(), False = not installed
+asyncio = aiohttp = None
+
+
+
+def _import_aiohttp():
+    """
+    Internal, import asyncio and aiohttp on first use, saves startup time for
+    runs with the default threads engine
+
+    :return: aiohttp module, False if not installed
+    """
+    global asyncio, aiohttp
+    if aiohttp is None:
+        try:
+            import asyncio
+            import aiohttp
+        except ImportError:
+            aiohttp = False
+    return aiohttp
+
+
+
+class Response:
+    """
+    Response received with aiohttp, the body is read completely, same
+    attributes as requests.Response as far as used by the callers
+    """
+
+    def __init__(self, status_code: int, headers, content: bytes, size: int):
+        """
+        Create response
+
+        :param status_code: HTTP status
+        :type status_code: int
+        :param headers: response headers, case-insensitive
+        :type headers: multidict.CIMultiDictProxy
+        :param content: body, decoded if sent with gzip Content-Encoding
+        :type content: bytes
+        :param size: bytes received
+        :type size: int
+        """
+        self.status_code = status_code
+        self.headers     = headers
+        self.content     = content
+        self.size        = size
+
+
+    @property
+    def text(self) -> str:
+        """
+        Body as text
+
+        :return: body
+        :rtype: str
+        """
+        return self.content.decode("utf-8", errors="replace")
+
+
+    @property
+    def is_redirect(self) -> bool:
+        """
+        Redirect response
+
+        :return: True if redirect
+        :rtype: bool
+        """
+        return self.status_code in REDIRECT_STATUS and "Location" in self.headers
+
+
+    def close(self):
+        """
+        Nothing to release, body is already read
+        """
+        pass
+
+
+
+async def run_steps(steps: typing.Generator, fetch: typing.Callable):
+    """
+    Run request steps, see windowplanner.WindowDispatcher.steps(), with
+    async fetch function, exceptions raised by fetch are thrown into the
+    generator
+
+    :param steps: generator yielding (start_utc, num_hours) requests
+    :type steps: typing.Generator
+    :param fetch: await fetch(start_utc, num_hours) returns records, None if failed, raises WindowRejectedError
+    :type fetch: typing.Callable
+    :return: return value of generator
+    """
+    try:
+        request = next(steps)
+        while True:
+            try:
+                result = await fetch(*request)
+            except Exception as e:
+                request = steps.throw(e)
+            else:
+                request = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+
+class AsyncEngine:
+    """
+    Run jobs concurrently on an asyncio event loop, with one aiohttp session
+
+    The connector limits the number of connections, in total and per API
+    server (aiohttp's limit_per_host), the number of concurrent requests per
+    hub is limited separately. Session, connections and semaphores are bound
+    to the event loop of run(), they are created for each run, the API
+    servers stay cached in MyenergiAPI.
+    """
+
+    def __init__(self, limit: int=DEFAULT_LIMIT, per_host: int=None, per_hub: int=None):
+        """
+        Create engine
+
+        :param limit: max number of concurrent jobs and connections, defaults to DEFAULT_LIMIT
+        :type limit: int, optional
+        :param per_host: max number of connections per API server, defaults to limit
+        :type per_host: int, optional
+        :param per_hub: max number of concurrent requests per hub, defaults to limit
+        :type per_hub: int, optional
+        :raises ImportError: aiohttp not installed
+        """
+        if not _import_aiohttp():
+            raise ImportError("AsyncEngine: aiohttp not installed")
+        self.limit    = limit
+        self.per_host = per_host or limit
+        self.per_hub  = per_hub or limit
+        # Bound to the event loop, created by run()
+        self._session    = None
+        self._hub_limits = {}       # MyenergiAPI -> asyncio.Semaphore
+        self._api_locks  = {}       # MyenergiAPI -> asyncio.Lock
+        self._auth       = {}       # MyenergiAPI -> aiohttp.DigestAuthMiddleware
+
+
+    def run(self, func: typing.Callable, jobs: typing.Iterable, sink: typing.Callable=None) -> list:
+        """
+        Run jobs on a new event loop, blocks until all are done
+
+        :param func: await func(engine, *args) for each job
+        :type func: typing.Callable
+        :param jobs: argument tuples
+        :type jobs: typing.Iterable
+        :param sink: sink(args, result) in job order, defaults to None
+        :type sink: typing.Callable, optional
+        :return: results in job order, None with sink
+        :rtype: list
+        """
+        return asyncio.run(self._run(func, jobs, sink))
+
+
+    async def _run(self, func: typing.Callable, jobs: typing.Iterable, sink: typing.Callable) -> list:
+        """
+        Internal, run jobs, at most 2 * limit jobs are started ahead of the
+        sink, keeping memory bounded
+        """
+        connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.per_host)
+        # No automatic gzip decoding, for the number of bytes received
+        async with aiohttp.ClientSession(connector=connector, auto_decompress=False,
+                                         headers={"Accept-Encoding": "gzip"}) as session:
+            self._session = session
+            self._hub_limits, self._api_locks, self._auth = {}, {}, {}
+            running = asyncio.Semaphore(self.limit)
+            async def job(args):
+                async with running:
+                    return await func(self, *args)
+
+            jobs    = iter(jobs)
+            pending = deque()
+            results = []
+            def submit(n):
+                for args in islice(jobs, n):
+                    pending.append((args, asyncio.ensure_future(job(args))))
+            try:
+                submit(2 * self.limit)
+                while pending:
+                    args, task = pending.popleft()
+                    submit(1)
+                    result = await task
+                    if sink:
+                        sink(args, result)
+                    else:
+                        results.append(result)
+            finally:
+                for args, task in pending:
+                    task.cancel()
+                await asyncio.gather(*(task for args, task in pending), return_exceptions=True)
+                self._session = None
+        return None if sink else results
+
+
+    async def sleep(self, delay: float):
+        """
+        Wait without blocking other jobs
+
+        :param delay: time in s
+        :type delay: float
+        """
+        await asyncio.sleep(delay)
+
+
+    async def _get(self, api: MyenergiAPI, url: str, headers: dict=None) -> Response:
+        """
+        Internal, HTTP GET request with digest auth of hub, body read completely
+
+        :param api: API client of hub, for serial, password, timeout
+        :type api: MyenergiAPI
+        :param url: URL
+        :type url: str
+        :param headers: request headers, defaults to None
+        :type headers: dict, optional
+        :return: response
+        :rtype: Response
+        """
+        auth = self._auth.get(api)
+        if auth is None:
+            # Sends the Authorization header preemptively after the first challenge
+            auth = self._auth[api] = aiohttp.DigestAuthMiddleware(api.serial, api.password)
+        timeout = aiohttp.ClientTimeout(sock_connect=api.timeout, sock_read=api.timeout)
+        async with self._session.get(url, headers=headers, allow_redirects=False, timeout=timeout,
+                                     middlewares=(auth,)) as r:
+            content = await r.read()
+        size = len(content)
+        if r.headers.get("Content-Encoding") == "gzip":
+            content = zlib.decompress(content, 16 + zlib.MAX_WBITS)
+        return Response(r.status, r.headers, content, size)
+
+
+    async def _call(self, host: str, api: MyenergiAPI, url: str, headers: dict=None) -> Response:
+        """
+        Internal, request with rate limit, retries and circuit breaker of the
+        request scheduler, same as scheduler.call()
+
+        :param host: host name
+        :type host: str
+        :param api: API client of hub
+        :type api: MyenergiAPI
+        :param url: URL
+        :type url: str
+        :param headers: request headers, defaults to None
+        :type headers: dict, optional
+        :raises TransientError: request failed after all retries
+        :raises CircuitOpenError: host failed repeatedly
+        :return: response
+        :rtype: Response
+        """
+        bucket, breaker = scheduler.limits(host)
+        attempt = 0
+        while True:
+            scheduler.allow(host, breaker)
+            wait = bucket.take()
+            while wait:
+                await asyncio.sleep(wait)
+                wait = bucket.take()
+            stats.count("requests")
+            try:
+                with stats.timer("http"):
+                    r = await self._get(api, url, headers)
+            except asyncio.TimeoutError as e:
+                delay = scheduler.failed(host, breaker, attempt, error=e)
+            else:
+                if r.status_code not in RETRY_STATUS:
+                    breaker.success()
+                    return r
+                delay = scheduler.failed(host, breaker, attempt, response=r)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+    async def api_server(self, api: MyenergiAPI) -> str:
+        """
+        Get API server of hub, from memory, director cache, or director
+        lookup, one lookup per hub at a time
+
+        :param api: API client of hub
+        :type api: MyenergiAPI
+        :raises TransientError: request failed after all retries, or connection error
+        :raises DirectorError: lookup failed
+        :return: API server host name
+        :rtype: str
+        """
+        lock = self._api_locks.setdefault(api, asyncio.Lock())
+        async with lock:
+            api_server = api.cached_api_server()
+            if api_server:
+                return api_server
+            director = MyenergiAPI.director_url
+            verbose("Director:", director)
+            with stats.timer("director"):
+                try:
+                    r = await self._call(urlsplit(director).hostname, api, director)
+                except aiohttp.ClientConnectionError as e:
+                    raise TransientError(f"{director}: {e}") from e
+            return api.set_api_server(r)
+
+
+    async def get_api(self, api: MyenergiAPI, path: str, headers: dict=None) -> Response:
+        """
+        HTTP GET request to API server of hub, re-resolves API server and
+        retries once on redirect or connection error, same as api.get_api()
+
+        :param api: API client of hub
+        :type api: MyenergiAPI
+        :param path: URL path without leading /
+        :type path: str
+        :param headers: request headers, defaults to None
+        :type headers: dict, optional
+        :raises TransientError: request failed after all retries, or connection error
+        :return: response
+        :rtype: Response
+        """
+        limit = self._hub_limits.setdefault(api, asyncio.Semaphore(self.per_hub))
+        async with limit:
+            for retry in (False, True):
+                api_server = await self.api_server(api)
+                try:
+                    r = await self._call(api_server, api, api.api_url(api_server, path), headers)
+                except aiohttp.ClientConnectionError as e:
+                    if retry:
+                        raise TransientError(f"{api_server}: {e}") from e
+                    api.invalidate_api_server()
+                    continue
+                if r.is_redirect and not retry:
+                    api.invalidate_api_server()
+                    continue
+                return r
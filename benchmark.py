@@ -0,0 +1,410 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   benchmark.py [-s month|year|5years] [-r hour|minute] [-n REPEAT] [-o FILE.json]
+#   benchmark.py -c OLD.json -o NEW.json           compare with previous results
+#
+# Benchmark of the myenergi-zappi2 pipeline with synthetic cgi-jdayhour and
+# cgi-jday payloads, no network. Stages are timed separately, best of
+# REPEAT runs:
+#   parse           json.loads() of hourly payloads
+#   decode          jdaydecode.decode_hourly(), minute data parsed and
+#                   decoded while streaming with jdaystream (includes parsing)
+#   timezone        local date/time with tzoffsets.TZOffsets, as used
+#   astimezone      reference, datetime.fromtimestamp(t, tz).strftime() per record
+#   csv_dot         csv_output.write() with "." decimal point locale
+#   csv_comma       csv_output.write() with "," decimal point locale, null if
+#                   no such locale is installed
+# Startup time of myenergi-zappi2.py --help (new interpreter, all module
+# imports) is measured against STARTUP_TARGET, with the heavy modules
+# loaded at startup.
+# Peak memory of the whole pipeline (without the synthetic payloads) is
+# measured in a separate run with tracemalloc. Results are written as JSON.
+# Minute data for 5 years needs about 2 GB of memory.
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       Benchmark of decode, timezone conversion and CSV output with
+#       synthetic payloads, JSON results, comparison with previous results,
+#       startup time of myenergi-zappi2.py
+# Version 0.2 / 2026-10-17
+#       --no-numpy with lazy NumPy import, pyarrow and asyncio as heavy
+#       modules
+# Version 0.3 / 2026-10-17
+#       tzoffsets format caches cleared before each run, runs start cold
+#       like a new process
+# Version 0.4 / 2026-10-17
+#       NumPy version reported also for runs not decoding hourly data
+# Version 0.5 / 2026-10-17
+#       aiohttp as heavy module, asyncio and aiohttp are loaded by
+#       --engine async only
+
+import argparse
+import json
+import locale
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone, timedelta
+from zoneinfo import ZoneInfo
+
+# Local modules
+from verbose import message, verbose, warning, error
+from csvoutput import csv_output
+import csvoutput
+import jdaydecode
+import jdaystream
+import tzoffsets
+from jdaydecode import decode_hourly
+from jdaystream import iter_records, decode_minutes
+from tzoffsets import TZOffsets
+from windowplanner import plan_windows, DEFAULT_MAX_HOURS
+
+global VERSION, AUTHOR, NAME
+VERSION = "0.5 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "benchmark"
+
+
+
+# Range starts on 2021-01-01 UTC, 5 years include 10 DST changes
+START       = datetime(2021, 1, 1, tzinfo=timezone.utc)
+SIZES       = { "month": 31, "year": 365, "5years": 5 * 365 + 1 }
+RESOLUTIONS = ("hour", "minute")
+STAGES      = ("parse", "decode", "timezone", "astimezone", "csv_dot", "csv_comma")
+# Candidates for "." and "," decimal point locales
+DOT_LOCALES   = ("C.UTF-8", "C.utf8", "en_US.UTF-8", "C")
+COMMA_LOCALES = ("de_DE.UTF-8", "de_DE.utf8", "de_DE", "German_Germany.1252", "nl_NL.UTF-8", "fr_FR.UTF-8")
+DEFAULT_REPEAT    = 3
+DEFAULT_THRESHOLD = 0.2
+MIN_DELTA         = 0.001           # s, ignore smaller differences (timer noise)
+DEFAULT_TIMEZONE  = "Europe/Berlin"
+CHUNK_SIZE        = 64 * 1024
+# s, myenergi-zappi2.py --help including interpreter startup
+STARTUP_TARGET    = 0.3
+HEAVY_MODULES     = ("requests", "icecream", "pygments", "tzdata", "numpy", "pyarrow", "asyncio", "aiohttp")
+FIELDS = ["Date", "Import (kWh)", "Export (kWh)", "BEV (kWh)"]
+TYPES  = ["str", "float", "float", "float"]
+
+
+
+def synthetic_records(start, count, seconds, rnd):
+    # Records like cgi-jdayhour (seconds=3600) or cgi-jday (seconds=60),
+    # joules per interval, fields with value 0 omitted like in the real API
+    records = []
+    scale = seconds * 1000              # kW -> joules per interval
+    day = None
+    for i in range(count):
+        t = start + i * seconds
+        if t // 86400 != day:
+            day = t // 86400
+            d = datetime.fromtimestamp(day * 86400, tz=timezone.utc)
+            date = { "yr": d.year, "mon": d.month, "dom": d.day, "dow": d.strftime("%a") }
+        hour, minute = divmod(t % 86400 // 60, 60)
+        r = dict(date, hr=hour, min=minute,
+                 imp=round(rnd.uniform(0.2, 1.5) * scale) if rnd.random() < 0.8 else 0,
+                 exp=round(rnd.uniform(0, 3.0) * scale) if 8 <= hour < 18 else 0,
+                 gep=round(rnd.uniform(0, 5.0) * scale) if 7 <= hour < 19 else 0,
+                 h1d=round(7.4 * scale) if 1 <= hour < 4 and date["dom"] % 3 == 0 else 0)
+        records.append({ k: v for k, v in r.items() if v })
+    return records
+
+
+
+def hourly_payloads(days, rnd):
+    # List of (start, hours, JSON payload) request windows like myenergi-zappi2
+    end = START + timedelta(days=days)
+    return [ (s, n, json.dumps({ "U12345678": synthetic_records(int(s.timestamp()), n, 3600, rnd) }))
+             for s, n in plan_windows(START, end, DEFAULT_MAX_HOURS) ]
+
+
+
+def minute_payloads(days, rnd):
+    # List of (start, JSON payload as bytes), one per UTC day like
+    # myenergi-zappi2 -m
+    starts = [ int(START.timestamp()) + day * 86400 for day in range(days) ]
+    return [ (start, json.dumps({ "U12345678": synthetic_records(start, 1440, 60, rnd) }).encode()) for start in starts ]
+
+
+
+def find_locale(candidates):
+    # First installed locale of candidates, None if none
+    current = locale.setlocale(locale.LC_ALL)
+    try:
+        for loc in candidates:
+            try:
+                locale.setlocale(locale.LC_ALL, loc)
+                return loc
+            except locale.Error:
+                continue
+        return None
+    finally:
+        locale.setlocale(locale.LC_ALL, current)
+
+
+
+class Timer:
+    # Accumulate elapsed time per stage
+
+    def __init__(self):
+        self.times = {}
+
+    def __call__(self, stage, func, *args):
+        t = time.perf_counter()
+        result = func(*args)
+        self.times[stage] = self.times.get(stage, 0) + time.perf_counter() - t
+        return result
+
+
+
+def run_hourly(payloads, tz, locales, timer):
+    # Hourly pipeline: parse, decode, local date/time, CSV output, returns
+    # number of records and payload bytes
+    columns = []
+    records = 0
+    size = 0
+    for start, hours, payload in payloads:
+        size += len(payload)
+        data = timer("parse", json.loads, payload)
+        cols = timer("decode", decode_hourly, data["U12345678"])
+        end = start + timedelta(hours=hours)
+        cols["date"] = timer("timezone", lambda: TZOffsets(tz, int(start.timestamp()), int(end.timestamp())).strftime(cols["time"], "%x %X"))
+        timer("astimezone", lambda: [ datetime.fromtimestamp(t, tz).strftime("%x %X") for t in cols["time"] ])
+        columns.append(cols)
+        records += len(cols["time"])
+    write_csv(columns, locales, timer)
+    return records, size
+
+
+
+def run_minutes(payloads, tz, locales, timer):
+    # Minute pipeline: streaming parse and decode per UTC day, local date/time,
+    # CSV output, returns number of records and payload bytes
+    columns = []
+    records = 0
+    size = 0
+    for start, payload in payloads:
+        size += len(payload)
+        chunks = [ payload[i:i + CHUNK_SIZE] for i in range(0, len(payload), CHUNK_SIZE) ]
+        cols = timer("decode", lambda: decode_minutes(iter_records(chunks), start, start + 86400))
+        times = cols["time"]
+        cols["date"] = timer("timezone", lambda: TZOffsets(tz, times[0], times[-1] + 1).strftime(times, "%x %X"))
+        timer("astimezone", lambda: [ datetime.fromtimestamp(t, tz).strftime("%x %X") for t in times ])
+        columns.append(cols)
+        records += len(times)
+    write_csv(columns, locales, timer)
+    return records, size
+
+
+
+def write_csv(columns, locales, timer):
+    # Write all columns to temporary CSV file, once per decimal point locale
+    current = locale.setlocale(locale.LC_ALL)
+    try:
+        for stage, loc in locales.items():
+            if not loc:
+                continue
+            with tempfile.TemporaryDirectory() as dir:
+                out = csv_output.new()
+                out.set_default_locale(loc)
+                out.add_fields(FIELDS, types=TYPES)
+                for cols in columns:
+                    out.add_columns([ cols["date"], cols["import"], cols["export"], cols["bev"] ])
+                timer(stage, out.write, os.path.join(dir, "benchmark.csv"), False)
+    finally:
+        locale.setlocale(locale.LC_ALL, current)
+
+
+
+def benchmark(resolution, size, tz, locales, repeat, seed):
+    # Best of repeat runs per stage, plus peak memory of an additional run,
+    # payloads are generated up front and not included
+    if resolution == "hour":
+        run, payloads = run_hourly, hourly_payloads(SIZES[size], random.Random(seed))
+    else:
+        run, payloads = run_minutes, minute_payloads(SIZES[size], random.Random(seed))
+    best = {}
+    for i in range(repeat):
+        # Formatted dates and times are cached across calls
+        tzoffsets._caches.clear()
+        timer = Timer()
+        records, size_bytes = run(payloads, tz, locales, timer)
+        for stage, t in timer.times.items():
+            best[stage] = min(best.get(stage, t), t)
+        verbose(resolution, size, f"run {i + 1}/{repeat}:", ", ".join(f"{stage} {t:.3f}s" for stage, t in timer.times.items()))
+    tracemalloc.start()
+    run(payloads, tz, locales, Timer())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return { "resolution":    resolution,
+             "size":          size,
+             "records":       records,
+             "payload_bytes": size_bytes,
+             "stages":        { stage: round(best[stage], 6) if stage in best else None for stage in STAGES },
+             "peak_memory":   peak }
+
+
+
+def startup(repeat):
+    # Startup time of myenergi-zappi2.py --help in a new interpreter, best of
+    # repeat runs, python -c pass for reference, heavy modules loaded
+    dir = os.path.dirname(os.path.abspath(__file__))
+    script = os.path.join(dir, "myenergi-zappi2.py")
+    def best(cmd):
+        times = []
+        for i in range(repeat):
+            t = time.perf_counter()
+            subprocess.run(cmd, stdout=subprocess.DEVNULL, check=True, cwd=dir)
+            times.append(time.perf_counter() - t)
+        return round(min(times), 6)
+    code = ("import json, runpy, sys\n"
+            f"sys.argv = [{script!r}, '--help']\n"
+            "try:\n"
+            f"    runpy.run_path({script!r}, run_name='__main__')\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            f"print(json.dumps([ m for m in {HEAVY_MODULES!r} if m in sys.modules ]))\n")
+    r = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=dir)
+    return { "seconds":     best([sys.executable, script, "--help"]),
+             "interpreter": best([sys.executable, "-c", "pass"]),
+             "target":      STARTUP_TARGET,
+             "modules":     json.loads(r.stdout.splitlines()[-1]) }
+
+
+
+def compare(old, new, threshold):
+    # Print stage times of new results relative to old ones, warn about
+    # regressions above threshold, returns number of regressions
+    old_results = { (r["resolution"], r["size"]): r for r in old["results"] }
+    regressions = 0
+    message(f"{'resolution':<10} {'size':<7} {'stage':<11} {'old':>9} {'new':>9} {'ratio':>6}")
+    for r in new["results"]:
+        o = old_results.get((r["resolution"], r["size"]))
+        if not o:
+            continue
+        items = list(r["stages"].items()) + [ ("peak_memory", r["peak_memory"]) ]
+        for stage, t in items:
+            t_old = o["stages"].get(stage) if stage != "peak_memory" else o.get("peak_memory")
+            if not t or not t_old:
+                continue
+            ratio = t / t_old
+            message(f"{r['resolution']:<10} {r['size']:<7} {stage:<11} {t_old:>9.4g} {t:>9.4g} {ratio:>6.2f}")
+            if ratio > 1 + threshold and (stage == "peak_memory" or t - t_old > MIN_DELTA):
+                warning(f"{r['resolution']} {r['size']} {stage}: {ratio:.2f}x slower than {old.get('date')}")
+                regressions += 1
+    if new.get("startup") and old.get("startup"):
+        t, t_old = new["startup"]["seconds"], old["startup"]["seconds"]
+        ratio = t / t_old
+        message(f"{'startup':<10} {'-':<7} {'seconds':<11} {t_old:>9.4g} {t:>9.4g} {ratio:>6.2f}")
+        if ratio > 1 + threshold and t - t_old > MIN_DELTA:
+            warning(f"startup: {ratio:.2f}x slower than {old.get('date')}")
+            regressions += 1
+    return regressions
+
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Benchmark decode, timezone and CSV output with synthetic data",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-s", "--size", action="append", choices=SIZES.keys(), help="data range, can be repeated (default all)")
+    arg.add_argument("-r", "--resolution", action="append", choices=RESOLUTIONS, help="hourly or minute data, can be repeated (default all)")
+    arg.add_argument("-n", "--repeat", type=int, default=DEFAULT_REPEAT, help=f"number of runs, best is reported (default {DEFAULT_REPEAT})")
+    arg.add_argument("-o", "--output", help="JSON output file (default stdout)")
+    arg.add_argument("-c", "--compare", help="compare with previous JSON results")
+    arg.add_argument("-t", "--threshold", type=float, default=DEFAULT_THRESHOLD, help=f"compare: report stages slower by more than this fraction (default {DEFAULT_THRESHOLD})")
+    arg.add_argument("-z", "--timezone", default=DEFAULT_TIMEZONE, help=f"timezone for local date/time (default {DEFAULT_TIMEZONE})")
+    arg.add_argument("--seed", type=int, default=1, help="random seed for synthetic data (default 1)")
+    arg.add_argument("--no-numpy", action="store_true", help="benchmark pure Python code paths")
+    arg.add_argument("--no-startup", action="store_true", help="don't measure startup time")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+    if args.repeat < 1:
+        error("illegal value for --repeat option:", args.repeat)
+    old = None
+    if args.compare:
+        try:
+            with open(args.compare, "r", encoding="utf-8") as f:
+                old = json.load(f)
+        except (OSError, ValueError) as e:
+            error("can't read", args.compare, e)
+    if args.no_numpy:
+        jdaydecode.np = False
+    tz = ZoneInfo(args.timezone)
+    locales = { "csv_dot": find_locale(DOT_LOCALES), "csv_comma": find_locale(COMMA_LOCALES) }
+    for stage, loc in locales.items():
+        if not loc:
+            warning(f"{stage}: no locale installed, skipped")
+        verbose(f"{stage}: locale {loc}")
+
+    start = None
+    if not args.no_startup:
+        verbose("Benchmark startup")
+        start = startup(args.repeat)
+        if start["seconds"] > STARTUP_TARGET:
+            warning(f"startup {start['seconds']:.3f}s above target {STARTUP_TARGET}s, modules loaded:", ", ".join(start["modules"]) or "-")
+    results = []
+    for resolution in args.resolution or RESOLUTIONS:
+        for size in args.size or SIZES.keys():
+            verbose("Benchmark", resolution, size)
+            results.append(benchmark(resolution, size, tz, locales, args.repeat, args.seed))
+
+    # NumPy is imported on first use, not at all for minute data
+    numpy = jdaydecode._import_numpy()
+    report = { "name":      NAME,
+               "version":   VERSION,
+               "modules":   { m.NAME: m.VERSION for m in (jdaydecode, jdaystream, tzoffsets, csvoutput) },
+               "date":      datetime.now(timezone.utc).isoformat(timespec="seconds"),
+               "python":    platform.python_version(),
+               "platform":  platform.platform(),
+               "numpy":     numpy.__version__ if numpy else None,
+               "timezone":  args.timezone,
+               "locales":   locales,
+               "repeat":    args.repeat,
+               "seed":      args.seed,
+               "startup":   start,
+               "results":   results }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    failures = 1 if start and start["seconds"] > STARTUP_TARGET else 0
+    if old:
+        failures += compare(old, report, args.threshold)
+    if failures:
+        error.set_errno(2)
+        error(failures, "regression(s) above threshold or target")
+
+
+
+
+if __name__ == "__main__":
+    main()
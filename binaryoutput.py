@@ -0,0 +1,515 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from binaryoutput import packed_output, packed_reader, arrow_output
+#   out = packed_output()                       fixed-width binary records
+#   out = arrow_output(parquet=None)            Parquet or Arrow IPC file (None = Parquet for *.parquet), requires pyarrow
+#   out.add_fields([name1, name2, ...], types=["time", "float", ...])
+#   out.add_row([a, b, c, ...])                 types from first row, if not set
+#   out.add_columns([column1, column2, ...])
+#   out.write(file="")                          file="" uses stdout
+#   out.open(file="", batch_size=DEFAULT_BATCH_SIZE)
+#   out.flush()
+#   out.close()
+#   reader = packed_reader(file)                memory-mapped
+#   len(reader), reader.fields, reader.types
+#   reader.rows()                               tuples, str decoded
+#   reader.records()                            NumPy structured array, zero-copy
+#   reader.column(name)                         NumPy array (zero-copy) or list
+#   reader.close()
+#
+# Packed format, little endian
+#   header  "MYENPACK", u16 version, u16 number of fields, u32 header size, u32 record size
+#   fields  u8 type (index in PACKED_TYPES), u16 width, u16 name length, name (UTF-8)
+#   padding to multiple of 8 bytes
+#   records fixed-width, str NUL padded UTF-8, time as epoch seconds
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       Binary output classes with the csv_output interface, packed fixed-width
+#       records (dependency-free, mmap'able), Parquet/Arrow via pyarrow
+# Version 0.2 / 2026-10-17
+#       NumPy and pyarrow are imported on first use
+# Version 0.3 / 2026-10-17
+#       add_fields() after open() raises ValueError, str truncated at UTF-8
+#       character boundary, removed _write_batch() stub from base class
+# Version 0.4 / 2026-10-17
+#       NumPy imported with jdaydecode._import_numpy()
+
+import mmap
+import struct
+import sys
+import typing
+from array import array
+from datetime import datetime
+
+# Optional, pyarrow for Parquet/Arrow output, imported on first use, see
+# _import_pyarrow(), False = not installed
+pa = pq = None
+
+# Local modules
+import csvoutput
+from csvoutput import DEFAULT_BATCH_SIZE, COLUMN_TYPES
+# NumPy is optional, for zero-copy reading of packed files
+from jdaydecode import _import_numpy
+
+VERSION = "0.4 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "binaryoutput"
+
+
+MAGIC           = b"MYENPACK"
+PACKED_VERSION  = 1
+PACKED_TYPES    = ("str", "float", "int", "time")
+STR_WIDTH       = 32
+_HEADER         = struct.Struct("<8sHHII")
+_FIELD          = struct.Struct("<BHH")
+
+
+
+def _import_pyarrow():
+    """
+    Internal, import pyarrow on first use, saves startup time for runs not
+    using it
+
+    :return: pyarrow module, False if not installed
+    """
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            pa = False
+    return pa
+
+
+
+def _infer_type(v) -> str:
+    """
+    Internal, column type of value
+
+    :param v: value
+    :return: column type, see csvoutput.COLUMN_TYPES
+    :rtype: str
+    """
+    if isinstance(v, bool) or isinstance(v, int):
+        return "int"
+    if isinstance(v, float):
+        return "float"
+    if isinstance(v, datetime):
+        return "time"
+    return "str"
+
+
+
+def _pack_str(v) -> bytes:
+    """
+    Internal, UTF-8 encoded str value, truncated to STR_WIDTH bytes without
+    splitting a multi-byte character
+
+    :param v: value
+    :return: encoded value
+    :rtype: bytes
+    """
+    b = str(v).encode("utf-8")
+    if len(b) > STR_WIDTH:
+        b = b[:STR_WIDTH].decode("utf-8", "ignore").encode("utf-8")
+    return b
+
+
+
+# csvoutput.csv_output is the global object, the class is its type
+class _binary_output(type(csvoutput.csv_output)):
+    """
+    Internal, base class for binary output, columnar buffers and interface
+    of csv_output, locale and CSV settings don't apply
+
+    Subclasses implement _write_batch(), writing the buffered columns, and
+    optionally _begin() and _end()
+    """
+
+    def add_fields(self, fields: list, types: list=None):
+        """
+        Add field names, optionally with column types, otherwise taken from
+        the first row
+
+        :param fields: field names
+        :type fields: list
+        :param types: column types, defaults to None
+        :type types: list, optional
+        :raises ValueError: output already open
+        """
+        if self._writer:
+            raise ValueError(f"{type(self).__name__}: add_fields() after open() not supported")
+        self._set_fields(fields, types)
+
+
+    def _set_fields(self, fields: list, types: list=None):
+        """
+        Internal, set field names and column types, header is written with
+        the first batch
+
+        :param fields: field names
+        :type fields: list
+        :param types: column types, defaults to None
+        :type types: list, optional
+        """
+        self._fields = fields
+        if types:
+            if len(types) != len(fields):
+                raise ValueError(f"{type(self).__name__}: number of fields and types differ")
+            self._types   = types
+            self._columns = [ array(COLUMN_TYPES[t]) if COLUMN_TYPES[t] else [] for t in types ]
+
+
+    def add_row(self, data: list):
+        """
+        Add data row
+
+        :param data: data row
+        :type data: list
+        """
+        if self._columns is None:
+            self._set_fields(self._fields or [ f"col{i}" for i in range(len(data)) ],
+                             [ _infer_type(v) for v in data ])
+        super().add_row(data)
+
+
+    def write(self, file: str=None, set_locale: bool=True, append: bool=False):
+        """
+        Write data to named file or stdout (default)
+
+        :param file: file name, defaults to None = stdout
+        :type file: str, optional
+        :param set_locale: ignored
+        :type set_locale: bool, optional
+        :param append: not supported, defaults to False
+        :type append: bool, optional
+        """
+        if not self._writer:
+            self.open(file, append=append)
+        self.close()
+
+
+    def open(self, file: str=None, set_locale: bool=True, batch_size: int=DEFAULT_BATCH_SIZE, append: bool=False):
+        """
+        Open named file or stdout (default) for streaming mode, data is
+        written in batches of batch_size rows
+
+        :param file: file name, defaults to None = stdout
+        :type file: str, optional
+        :param set_locale: ignored
+        :type set_locale: bool, optional
+        :param batch_size: number of rows per batch, defaults to DEFAULT_BATCH_SIZE
+        :type batch_size: int, optional
+        :param append: not supported, defaults to False
+        :type append: bool, optional
+        """
+        if append:
+            raise ValueError(f"{type(self).__name__}: append mode not supported")
+        if file:
+            self._file = open(file, "wb")
+            self._close_file = True
+        else:
+            self._file = sys.stdout.buffer
+            self._close_file = False
+        self._writer = self
+        self._batch_size = batch_size
+        self._started = False
+        if self._cached_rows() >= self._batch_size:
+            self.flush()
+
+
+    def flush(self):
+        """
+        Streaming mode, write all buffered rows
+        """
+        if not self._writer or self._columns is None:
+            return
+        if not self._started:
+            self._begin()
+            self._started = True
+        if self._cached_rows():
+            self._write_batch()
+            self._clear_cached()
+        self._file.flush()
+
+
+    def close(self):
+        """
+        Streaming mode, write all buffered rows and close output file
+        """
+        if not self._writer:
+            return
+        self.flush()
+        if self._started:
+            self._end()
+        if self._close_file:
+            self._file.close()
+        self._file   = None
+        self._writer = None
+
+
+    def _begin(self):
+        """
+        Internal, start of output, columns types are known
+        """
+
+
+    def _end(self):
+        """
+        Internal, end of output
+        """
+
+
+
+class packed_output(_binary_output):
+    """
+    Packed binary output, fixed-width little endian records after a self
+    describing header, which can be memory-mapped and read without parsing
+    """
+
+    def _record_format(self) -> str:
+        """
+        Internal, struct format of record
+
+        :return: format
+        :rtype: str
+        """
+        return "<" + "".join(f"{STR_WIDTH}s" if t == "str" else "d" if t == "float" else "q"  for t in self._types)
+
+
+    def _begin(self):
+        """
+        Internal, write header
+        """
+        self._struct = struct.Struct(self._record_format())
+        fields = b""
+        for name, ctype in zip(self._fields, self._types):
+            name = str(name).encode("utf-8")
+            fields += _FIELD.pack(PACKED_TYPES.index(ctype), STR_WIDTH if ctype == "str" else 8, len(name)) + name
+        size = _HEADER.size + len(fields)
+        size += -size % 8
+        header = _HEADER.pack(MAGIC, PACKED_VERSION, len(self._fields), size, self._struct.size) + fields
+        self._file.write(header.ljust(size, b"\0"))
+
+
+    def _write_batch(self):
+        """
+        Internal, pack and write buffered rows
+        """
+        columns = [ [ _pack_str(v) for v in col ] if t == "str" else col
+                    for t, col in zip(self._types, self._columns) ]
+        pack = self._struct.pack
+        self._file.write(b"".join(pack(*row) for row in zip(*columns)))
+
+
+
+class packed_reader:
+    """
+    Reader for packed binary files, memory-mapped
+    """
+
+    def __init__(self, file: str):
+        """
+        Open and map packed file
+
+        :param file: file name
+        :type file: str
+        :raises ValueError: not a packed file
+        """
+        with open(file, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, self.header_size, self.record_size = _HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != PACKED_VERSION:
+            raise ValueError(f"packed_reader: {file}: not a packed file")
+        self.fields = []
+        self.types  = []
+        self.widths = []
+        pos = _HEADER.size
+        for i in range(n):
+            ctype, width, length = _FIELD.unpack_from(self._mm, pos)
+            pos += _FIELD.size
+            self.fields.append(self._mm[pos:pos + length].decode("utf-8"))
+            self.types.append(PACKED_TYPES[ctype])
+            self.widths.append(width)
+            pos += length
+        self._struct = struct.Struct("<" + "".join(f"{w}s" if t == "str" else "d" if t == "float" else "q"
+                                                   for t, w in zip(self.types, self.widths)))
+        # Incomplete last record (interrupted write) is ignored
+        self.count = (len(self._mm) - self.header_size) // self.record_size
+
+
+    def __len__(self) -> int:
+        """
+        Number of records
+
+        :return: records
+        :rtype: int
+        """
+        return self.count
+
+
+    def _data(self) -> memoryview:
+        """
+        Internal, records as memoryview, no copy
+
+        :return: records
+        :rtype: memoryview
+        """
+        return memoryview(self._mm)[self.header_size:self.header_size + self.count * self.record_size]
+
+
+    def rows(self) -> typing.Iterator:
+        """
+        Iterate over records
+
+        :return: tuples, str values decoded
+        :rtype: typing.Iterator
+        """
+        strs = [ i for i, t in enumerate(self.types) if t == "str" ]
+        for row in self._struct.iter_unpack(self._data()):
+            if strs:
+                row = list(row)
+                for i in strs:
+                    row[i] = row[i].rstrip(b"\0").decode("utf-8", errors="replace")
+            yield tuple(row)
+
+
+    def records(self):
+        """
+        Records as NumPy structured array, zero-copy view of the mapped file
+
+        :return: structured array, str fields as bytes
+        :rtype: numpy.ndarray
+        """
+        np = _import_numpy()
+        if not np:
+            raise ImportError("packed_reader: records() requires NumPy")
+        dtype = np.dtype([ (name, f"S{w}" if t == "str" else "<f8" if t == "float" else "<i8")
+                           for name, t, w in zip(self.fields, self.types, self.widths) ])
+        return np.frombuffer(self._mm, dtype=dtype, count=self.count, offset=self.header_size)
+
+
+    def column(self, name: str):
+        """
+        Single column, zero-copy NumPy view if available, list otherwise
+
+        :param name: field name
+        :type name: str
+        :return: column values
+        """
+        if _import_numpy():
+            return self.records()[name]
+        i = self.fields.index(name)
+        return [ row[i] for row in self.rows() ]
+
+
+    def close(self):
+        """
+        Unmap file
+        """
+        self._mm.close()
+
+
+
+class arrow_output(_binary_output):
+    """
+    Parquet or Arrow IPC file output, requires pyarrow, one row group or
+    record batch per flush
+    """
+
+    def __init__(self, parquet: bool=None):
+        """
+        Create output object
+
+        :param parquet: Parquet or Arrow IPC file format, defaults to None = by file name
+        :type parquet: bool, optional
+        :raises ImportError: pyarrow not installed
+        """
+        if not _import_pyarrow():
+            raise ImportError("arrow_output: pyarrow not installed")
+        super().__init__()
+        self.parquet = parquet
+
+
+    def new(self):
+        """
+        Create new output object with the same settings
+
+        :return: new output object
+        :rtype: arrow_output
+        """
+        obj = super().new()
+        obj.parquet = self.parquet
+        return obj
+
+
+    def open(self, file: str=None, set_locale: bool=True, batch_size: int=DEFAULT_BATCH_SIZE, append: bool=False):
+        """
+        Open named file or stdout (default), Parquet or Arrow IPC file format,
+        if not set Parquet for *.parquet
+
+        :param file: file name, defaults to None = stdout
+        :type file: str, optional
+        :param set_locale: ignored
+        :type set_locale: bool, optional
+        :param batch_size: number of rows per batch, defaults to DEFAULT_BATCH_SIZE
+        :type batch_size: int, optional
+        :param append: not supported, defaults to False
+        :type append: bool, optional
+        """
+        self._parquet = self.parquet if self.parquet is not None else bool(file) and file.endswith(".parquet")
+        super().open(file, set_locale, batch_size, append)
+
+
+    def _schema(self):
+        """
+        Internal, Arrow schema for column types
+
+        :return: schema
+        :rtype: pyarrow.Schema
+        """
+        types = { "str": pa.string(), "float": pa.float64(), "int": pa.int64(), "time": pa.timestamp("s", tz="UTC") }
+        return pa.schema([ (str(name), types[t]) for name, t in zip(self._fields, self._types) ])
+
+
+    def _begin(self):
+        """
+        Internal, create Parquet or Arrow writer
+        """
+        self._schema_ = self._schema()
+        if self._parquet:
+            self._arrow = pq.ParquetWriter(self._file, self._schema_)
+        else:
+            self._arrow = pa.ipc.new_file(self._file, self._schema_)
+
+
+    def _write_batch(self):
+        """
+        Internal, write buffered rows as one row group / record batch
+        """
+        arrays = [ pa.array(col, type=field.type) for col, field in zip(self._columns, self._schema_) ]
+        self._arrow.write_table(pa.Table.from_arrays(arrays, schema=self._schema_))
+
+
+    def _end(self):
+        """
+        Internal, write footer
+        """
+        self._arrow.close()
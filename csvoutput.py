@@ -20,7 +20,17 @@
 #   csv_output.set_float_format(fmt="%.3f")
 #   csv_output.add_row([a, b, c, ...])
 #   csv_output.add_fields([name1, name2, ...])
-#   csv_output.write(file="", set_locale=True)       file="" uses stdout
+#   csv_output.add_fields([name1, name2, ...], types=["time", "float", ...])
+#   csv_output.add_columns([column1, column2, ...])
+#   csv_output.column(name)
+#   csv_output.set_time_format(fmt="%x %X", tz=None)
+#   csv_output.write(file="", set_locale=True, append=False)       file="" uses stdout
+#   csv_output.new()                                  new object, same settings
+#   csv_output.open(file="", set_locale=True, batch_size=DEFAULT_BATCH_SIZE, append=False)
+#   csv_output.set_append_key(key, group=None, groups=None)
+#                                                     key(row), group(row) for rows as strings
+#   csv_output.flush()
+#   csv_output.close()
 #   csv_output(a, b, c, ...)
 #   csv_output(row=[a, b, c, ...])
 #   csv_output(fields=[a, b, c, ...])
@@ -35,19 +45,66 @@
 #       Reworked as a proper csv_output object, added new interface
 # Version 2.1 / 2024-12-16
 #       Added docstrings
+# Version 2.2 / 2026-10-17
+#       Added streaming mode: .open() output file up front, rows are written
+#       in batches, header on .add_fields()
+# Version 2.3 / 2026-10-17
+#       Precompiled float formatter, decimal point resolved once per write
+# Version 2.4 / 2026-10-17
+#       Added columnar mode, .add_fields() with column types, numeric columns
+#       stored in array buffers, timestamps as epoch seconds
+# Version 2.5 / 2026-10-17
+#       Time columns formatted in bulk using tzoffsets.TZOffsets
+# Version 2.6 / 2026-10-17
+#       Added .new() for additional CSV output objects
+# Version 2.7 / 2026-10-17
+#       Added append mode for .open() and .write(), only the tail of an
+#       existing file is read, rows already present are skipped
+# Version 2.8 / 2026-10-17
+#       .add_row() in columnar mode raises ValueError for rows with the wrong
+#       number of values, instead of misaligning columns
+# Version 2.9 / 2026-10-17
+#       Append mode with groups reads the file backwards until all groups
+#       have a last row, not just the last DEFAULT_TAIL_SIZE bytes
+# Version 2.10 / 2026-10-17
+#       Formatting of time columns timed as timezone (--stats)
 
 
 import csv
+import io
 import locale
+import os
+from array import array
+from datetime import datetime, tzinfo
+import re
 import sys
 import typing
 
-VERSION = "2.1 / 2024-12-16"
+# Local modules
+from tzoffsets import TZOffsets
+from verbose import stats
+
+VERSION = "2.10 / 2026-10-17"
 AUTHOR  = "Martin Junius"
 NAME    = "csvoutput"
 
 
 DEFAULT_FLOAT_FORMAT = "%f"
+DEFAULT_BATCH_SIZE   = 1000
+DEFAULT_TIME_FORMAT  = "%x %X"
+DEFAULT_TAIL_SIZE    = 65536    # bytes read from the end of a file in append mode
+
+# Column types for columnar mode -> array typecode, None = Python list
+COLUMN_TYPES = {
+    "str":   None,
+    "float": "d",
+    "int":   "q",
+    "time":  "q",       # epoch seconds, formatted with time format on output
+}
+
+# Float format strings with a single conversion and no literal text, which can
+# be formatted with plain % and a replaced decimal point
+_SIMPLE_FLOAT_FMT = re.compile(r'%[-#0 +]*\d*(?:\.\d+)?[eEfFgG]')
 
 class csv_output:
     """
@@ -61,6 +118,18 @@ class csv_output:
         self._cache      = []
         self._fields     = None
         self._float_fmt  = None    # format for floats if set
+        self._file       = None    # output file handle in streaming mode
+        self._writer     = None    # CSV writer in streaming mode
+        self._close_file = False   # close file handle on .close()
+        self._batch_size = DEFAULT_BATCH_SIZE
+        self._types      = None    # column types in columnar mode
+        self._columns    = None    # column buffers in columnar mode
+        self._time_fmt   = DEFAULT_TIME_FORMAT
+        self._time_tz    = None    # timezone for time columns, None = local
+        self._append_key = None    # key(row) for rows already present in append mode
+        self._append_group = None  # group(row), separate last key per group
+        self._append_groups = None # groups expected in file
+        self._last       = None    # group -> [last key, count] in append mode
 
 
     def __call__(self, *args, **kwargs):
@@ -81,6 +150,24 @@ class csv_output:
             self.add_row(row)
 
 
+    def new(self):
+        """
+        Create new CSV output object with the same float and time format
+        settings, e.g. for writing several files
+
+        :return: new CSV output object
+        :rtype: csv_output
+        """
+        obj = type(self)()
+        obj._float_fmt = self._float_fmt
+        obj._time_fmt  = self._time_fmt
+        obj._time_tz   = self._time_tz
+        obj._append_key   = self._append_key
+        obj._append_group = self._append_group
+        obj._append_groups = self._append_groups
+        return obj
+
+
     def set_default_locale(self, loc: str=""):
         """
         Set locale for CSV output
@@ -105,6 +192,40 @@ class csv_output:
         self._float_fmt = fmt
 
 
+    def set_time_format(self, fmt: str=DEFAULT_TIME_FORMAT, tz: tzinfo=None):
+        """
+        Set format string and timezone for time columns (columnar mode)
+
+        :param fmt: strftime() format string, defaults to DEFAULT_TIME_FORMAT
+        :type fmt: str, optional
+        :param tz: timezone, defaults to None = local time
+        :type tz: tzinfo, optional
+        """
+        self._time_fmt = fmt
+        self._time_tz  = tz
+
+
+    def set_append_key(self, key: typing.Callable, group: typing.Callable=None, groups: list=None):
+        """
+        Set key function for append mode, rows (as strings, the same way as in
+        the file) with a key lower than the key of the last row in the file
+        are skipped, as well as rows with the same key already present. Without
+        key function all rows are appended. key() is called for the rows of
+        the file and then for the new rows, in order.
+
+        :param key: key(row) returns comparable value, e.g. timestamp
+        :type key: typing.Callable
+        :param group: group(row), separate last key per group, defaults to None
+        :type group: typing.Callable, optional
+        :param groups: groups expected in the file, read until all of them
+            have a last row, defaults to None = DEFAULT_TAIL_SIZE bytes only
+        :type groups: list, optional
+        """
+        self._append_key    = key
+        self._append_group  = group
+        self._append_groups = groups
+
+
     def _fmt(self, v: float):
         """
         Internal, format float using locale
@@ -117,24 +238,308 @@ class csv_output:
         return locale.format_string(self._float_fmt, v)
 
 
+    def _float_formatter(self) -> typing.Callable:
+        """
+        Internal, precompiled formatter for floats, same output as ._fmt()
+        for the current locale, but without parsing the format string and
+        querying the locale for every single value
+
+        :return: function formatting a float as string
+        :rtype: typing.Callable
+        """
+        fmt = self._float_fmt
+        if not _SIMPLE_FLOAT_FMT.fullmatch(fmt):
+            return self._fmt
+        decimal_point = locale.localeconv()['decimal_point']
+        if decimal_point == ".":
+            return fmt.__mod__
+        return lambda v: (fmt % v).replace(".", decimal_point)
+
+
     def add_row(self, data: list):
         """
         Add data row to CSV output
 
         :param data: data row 
         :type data: list
+        :raises ValueError: number of values differs from number of columns
+        """
+        if self._columns is None:
+            self._cache.append(data)
+        else:
+            if len(data) != len(self._columns):
+                raise ValueError(f"csv_output: row has {len(data)} values, {len(self._columns)} columns")
+            for col, ctype, v in zip(self._columns, self._types, data):
+                if ctype == "time" and isinstance(v, datetime):
+                    v = int(v.timestamp())
+                col.append(v)
+        if self._writer and self._cached_rows() >= self._batch_size:
+            self.flush()
+
+
+    def add_columns(self, columns: list):
+        """
+        Add data columns to CSV output (columnar mode), all columns must have
+        the same length
+
+        :param columns: data columns, any sequence (list, array, ...)
+        :type columns: list
         """
-        self._cache.append(data)
+        if self._columns is None:
+            raise ValueError("csv_output: add_columns() requires column types")
+        if len(set(len(c) for c in columns)) > 1:
+            raise ValueError("csv_output: columns differ in length")
+        for col, data in zip(self._columns, columns):
+            col.extend(data)
+        if self._writer and self._cached_rows() >= self._batch_size:
+            self.flush()
 
 
-    def add_fields(self, fields: list):
+    def column(self, name: str) -> typing.Sequence:
         """
-        Add field names to CSV output (1st row=header)
+        Get buffer of column (columnar mode), array columns can be used with
+        numpy.frombuffer() without copying
+
+        :param name: field name
+        :type name: str
+        :return: column buffer
+        :rtype: typing.Sequence
+        """
+        return self._columns[self._fields.index(name)]
+
+
+    def add_fields(self, fields: list, types: list=None):
+        """
+        Add field names to CSV output (1st row=header), optionally with column
+        types for columnar mode, see COLUMN_TYPES
 
         :param fields: field names
         :type fields: list
+        :param types: column types, defaults to None = row mode
+        :type types: list, optional
         """
         self._fields = fields
+        if types:
+            if len(types) != len(fields):
+                raise ValueError("csv_output: number of fields and types differ")
+            self._types   = types
+            self._columns = [ array(COLUMN_TYPES[t]) if COLUMN_TYPES[t] else [] for t in types ]
+        if self._writer and self._last is None:
+            # Streaming mode, write header right away, before buffered rows,
+            # not when appending to an existing file
+            self._writer.writerow(self._fields)
+
+
+    def _csv_writer(self, f: typing.TextIO):
+        """
+        Internal, create CSV writer for output file handle, setting CSV dialect
+        according to locale, generates "German" Excel CSV
+
+        :param f: file handle
+        :type f: typing.TextIO
+        :return: CSV writer
+        :rtype: _csv.writer
+        """
+        delimiter, quoting = self._csv_dialect()
+        return csv.writer(f, dialect="excel", delimiter=delimiter, quoting=quoting)
+
+
+    def _csv_dialect(self) -> tuple:
+        """
+        Internal, CSV delimiter and quoting according to locale
+
+        :return: (delimiter, quoting)
+        :rtype: tuple
+        """
+        if locale.localeconv()['decimal_point'] == ",":
+            # Use ; as the separator and quote all fields for easy import in "German" Excel
+            return ";", csv.QUOTE_ALL
+        else:
+            return ",", csv.QUOTE_MINIMAL
+
+
+    def _write_rows(self, writer, rows: list):
+        """
+        Internal, write rows converting float data according to locale
+
+        :param writer: CSV writer
+        :type writer: _csv.writer
+        :param rows: data rows
+        :type rows: list
+        """
+        if not self._float_fmt:
+            writer.writerows(self._skip_present(rows))
+            return
+        # Convert float values, formatter resolved once for all rows
+        fmt = self._float_formatter()
+        writer.writerows(self._skip_present([ fmt(v) if type(v) is float else v   for v in row ] for row in rows))
+
+
+    def _read_tail(self, f: typing.BinaryIO, tail_size: int=DEFAULT_TAIL_SIZE) -> list:
+        """
+        Internal, append mode, check header of existing file, read rows from
+        the tail of the file and truncate an incomplete last row, with groups
+        (see .set_append_key()) the tail is extended until it has rows of all
+        groups, or up to the header
+
+        :param f: file handle, binary read/write
+        :type f: typing.BinaryIO
+        :param tail_size: max bytes read from the end, defaults to DEFAULT_TAIL_SIZE
+        :type tail_size: int, optional
+        :return: rows (as strings) from the tail of the file, without header
+        :rtype: list
+        """
+        reader = lambda text: csv.reader(io.StringIO(text), delimiter=self._csv_dialect()[0])
+        header = next(reader(f.readline().decode("utf-8")), None)
+        if self._fields and header != [ str(x) for x in self._fields ]:
+            raise ValueError("csv_output: header or CSV format of existing file differs")
+
+        size = f.seek(0, os.SEEK_END)
+        pos  = max(size - tail_size, 0)
+        f.seek(pos)
+        data = f.read()
+        # Interrupted write, drop incomplete last row
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(pos + end)
+            data = data[:end]
+        while True:
+            # Drop header or partial first line
+            rows = list(reader(data.decode("utf-8", errors="replace").partition("\n")[2]))
+            if pos == 0 or not self._append_groups or not self._append_group:
+                return rows
+            missing = set(self._append_groups)
+            for row in rows:
+                try:
+                    missing.discard(self._append_group(row))
+                except IndexError:
+                    pass
+            if not missing:
+                return rows
+            # Read the next chunk before the current tail
+            tail_size *= 4
+            pos, end = max(size - tail_size, 0), pos
+            f.seek(pos)
+            data = f.read(end - pos) + data
+
+
+    def _set_last(self, rows: list):
+        """
+        Internal, append mode, last key and number of rows with this key per group
+
+        :param rows: rows (as strings) from the tail of the file
+        :type rows: list
+        """
+        self._last = {}
+        if not self._append_key:
+            return
+        for row in rows:
+            try:
+                g, k = self._append_group(row) if self._append_group else None, self._append_key(row)
+            except (ValueError, LookupError):
+                continue
+            last = self._last.get(g)
+            if last is None or k > last[0]:
+                self._last[g] = [k, 1]
+            elif k == last[0]:
+                last[1] += 1
+
+
+    def _present(self, row: list) -> bool:
+        """
+        Internal, append mode, check whether row is already present in file
+
+        :param row: row
+        :type row: list
+        :return: row present
+        :rtype: bool
+        """
+        row  = [ str(v) for v in row ]
+        last = self._last.get(self._append_group(row) if self._append_group else None)
+        if last is None:
+            return False
+        k = self._append_key(row)
+        if k < last[0]:
+            return True
+        if k == last[0] and last[1] > 0:
+            last[1] -= 1
+            return True
+        return False
+
+
+    def _skip_present(self, rows: typing.Iterable) -> typing.Iterable:
+        """
+        Internal, append mode, skip rows already present in file
+
+        :param rows: rows
+        :type rows: typing.Iterable
+        :return: rows not present
+        :rtype: typing.Iterable
+        """
+        if not self._last:
+            return rows
+        return ( row for row in rows if not self._present(row) )
+
+
+    def _column_values(self, ctype: str, col: typing.Sequence) -> list:
+        """
+        Internal, convert column buffer to list of output values
+
+        :param ctype: column type
+        :type ctype: str
+        :param col: column buffer
+        :type col: typing.Sequence
+        :return: output values
+        :rtype: list
+        """
+        if ctype == "float":
+            if self._float_fmt:
+                return list(map(self._float_formatter(), col))
+            return col.tolist()
+        if ctype == "time":
+            fmt, tz = self._time_fmt, self._time_tz
+            with stats.timer("timezone"):
+                if tz and len(col):
+                    return TZOffsets(tz, min(col), max(col) + 1).strftime(col, fmt)
+                return [ datetime.fromtimestamp(t, tz).strftime(fmt) for t in col ]
+        if ctype == "int":
+            return col.tolist()
+        return col
+
+
+    def _cached_rows(self) -> int:
+        """
+        Internal, number of rows not yet written
+
+        :return: number of rows
+        :rtype: int
+        """
+        if self._columns is None:
+            return len(self._cache)
+        return len(self._columns[0]) if self._columns else 0
+
+
+    def _write_cached(self, writer):
+        """
+        Internal, write all rows not yet written, row or columnar mode
+
+        :param writer: CSV writer
+        :type writer: _csv.writer
+        """
+        if self._columns is None:
+            self._write_rows(writer, self._cache)
+        else:
+            # Format column-wise, then transpose to rows
+            writer.writerows(self._skip_present(zip(*[ self._column_values(t, c) for t, c in zip(self._types, self._columns) ])))
+
+
+    def _clear_cached(self):
+        """
+        Internal, clear rows already written
+        """
+        self._cache = []
+        if self._columns is not None:
+            self._columns = [ array(c.typecode) if isinstance(c, array) else [] for c in self._columns ]
 
 
     def _write(self, f: typing.TextIO):            
@@ -145,22 +550,13 @@ class csv_output:
         :param f: file handle
         :type f: typing.TextIO
         """
-        if locale.localeconv()['decimal_point'] == ",":
-            # Use ; as the separator and quote all fields for easy import in "German" Excel
-            writer = csv.writer(f, dialect="excel", delimiter=";", quoting=csv.QUOTE_ALL)
-        else:
-            writer = csv.writer(f, dialect="excel")
+        writer = self._csv_writer(f)
         if self._fields:
             writer.writerow(self._fields)
-        
-        # Write rows one by one the enable conversion of float values
-        for row in self._cache:
-            if self._float_fmt:
-                row = [ self._fmt(v) if type(v) == float else v   for v in row ]
-            writer.writerow(row)
+        self._write_cached(writer)
 
 
-    def write(self, file: str=None, set_locale: bool=True):
+    def write(self, file: str=None, set_locale: bool=True, append: bool=False):
         """
         Write CSV data to named file oder stdout (default), setting locale if enabled
 
@@ -168,7 +564,19 @@ class csv_output:
         :type file: str, optional
         :param set_locale: set locale, defaults to True
         :type set_locale: bool, optional
+        :param append: append to existing file, see .open(), defaults to False
+        :type append: bool, optional
         """
+        if self._writer:
+            # Streaming mode, just write the remaining rows
+            self.close()
+            return
+
+        if append and file:
+            self.open(file, set_locale, append=True)
+            self.close()
+            return
+
         if set_locale:
             self.set_default_locale()
 
@@ -179,6 +587,73 @@ class csv_output:
                 self._write(sys.stdout)
 
 
+    def open(self, file: str=None, set_locale: bool=True, batch_size: int=DEFAULT_BATCH_SIZE, append: bool=False):
+        """
+        Open named file or stdout (default) for streaming mode, setting locale
+        if enabled. Rows are written in batches of batch_size, the header is
+        written by .add_fields(), or right away if already set.
+
+        With append=True rows are appended to an existing file, which must have
+        the same header and CSV format. Only the tail of the file is read to
+        skip rows already present, see .set_append_key().
+
+        :param file: file name, defaults to None = stdout
+        :type file: str, optional
+        :param set_locale: set locale, defaults to True
+        :type set_locale: bool, optional
+        :param batch_size: number of rows per batch, defaults to DEFAULT_BATCH_SIZE
+        :type batch_size: int, optional
+        :param append: append to existing file, defaults to False
+        :type append: bool, optional
+        """
+        if set_locale:
+            self.set_default_locale()
+
+        header = True
+        self._last = None
+        if file and append and os.path.exists(file) and os.path.getsize(file) > 0:
+            with open(file, 'r+b') as f:
+                self._set_last(self._read_tail(f))
+            header = False
+        if file:
+            self._file = open(file, 'a' if not header else 'w', newline='', encoding="utf-8")
+            self._close_file = True
+        else:
+            self._file = sys.stdout
+            self._close_file = False
+        self._writer = self._csv_writer(self._file)
+        self._batch_size = batch_size
+        if self._fields and header:
+            self._writer.writerow(self._fields)
+        # Rows added before .open() go into the first batch
+        if self._cached_rows() >= self._batch_size:
+            self.flush()
+
+
+    def flush(self):
+        """
+        Streaming mode, write all buffered rows and flush output file
+        """
+        if not self._writer:
+            return
+        self._write_cached(self._writer)
+        self._clear_cached()
+        self._file.flush()
+
+
+    def close(self):
+        """
+        Streaming mode, write all buffered rows and close output file
+        """
+        if not self._writer:
+            return
+        self.flush()
+        if self._close_file:
+            self._file.close()
+        self._file   = None
+        self._writer = None
+
+
 
 # Global object
 csv_output = csv_output()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from hourstore import HourStore
+#   store = HourStore(file=DEFAULT_DB_FILE)
+#   store.upsert(id, columns)                   columns as returned by jdaydecode.decode_hourly()
+#   store.upsert(id, columns, tz)               also update rollups for local timezone
+#   columns = store.query(id, start_utc, end_utc)
+#   sums = store.query_rollups(id, resolution, first, last)
+#                                               rollups (see module rollups), local day numbers first to last (exclusive)
+#   store.has_rollups(id)
+#   store.rebuild_rollups(id, tz)
+#   store.range(id)                             (first, last) UTC epoch, (None, None) if empty
+#   store.close()
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       SQLite store for decoded hourly records, primary key (hub id, UTC
+#       hour), upsert, time range queries
+# Version 0.2 / 2026-10-17
+#       Rollup tables by local day, week, month, updated with new hours
+
+import sqlite3
+from array import array
+from datetime import datetime, tzinfo
+
+# Local modules
+from jdaydecode import COLUMNS
+import rollups
+
+VERSION = "0.2 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "hourstore"
+
+
+DEFAULT_DB_FILE = "MyEnergi_Data.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hourly (
+    hub         TEXT    NOT NULL,
+    time        INTEGER NOT NULL,   -- UTC epoch seconds, start of hour
+    import      REAL    NOT NULL,   -- kWh
+    export      REAL    NOT NULL,
+    generation  REAL    NOT NULL,
+    bev         REAL    NOT NULL,
+    PRIMARY KEY (hub, time)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS hourly_time ON hourly (time);
+"""
+
+# Rollup tables rollup_day, rollup_week, rollup_month
+_ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_{resolution} (
+    hub         TEXT    NOT NULL,
+    period      INTEGER NOT NULL,   -- local day number of period start
+    hours       INTEGER NOT NULL,
+    import      REAL    NOT NULL,   -- kWh
+    export      REAL    NOT NULL,
+    generation  REAL    NOT NULL,
+    bev         REAL    NOT NULL,
+    PRIMARY KEY (hub, period)
+) WITHOUT ROWID;
+"""
+ROLLUP_RESOLUTIONS = rollups.RESOLUTIONS[1:]
+
+
+
+class HourStore:
+    """
+    SQLite time-series store for hourly data of several hubs
+
+    The primary key (hub, time) doubles as the index for time range queries
+    per hub, the time index serves queries across all hubs. Overlapping
+    fetches update existing hours (upsert). The rollup tables are updated for
+    all periods touched by new hours, summing only these periods again.
+    """
+
+    def __init__(self, file: str=DEFAULT_DB_FILE):
+        """
+        Open database, create tables if necessary
+
+        :param file: database file, defaults to DEFAULT_DB_FILE
+        :type file: str, optional
+        """
+        self.file = file
+        self.db   = sqlite3.connect(file)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA + "".join(_ROLLUP_SCHEMA.format(resolution=r) for r in ROLLUP_RESOLUTIONS))
+
+
+    def upsert(self, id: str, columns: dict, tz: tzinfo=None):
+        """
+        Insert or update hours, single transaction, update rollups
+
+        :param id: hub id
+        :type id: str
+        :param columns: name -> column, see jdaydecode.COLUMNS
+        :type columns: dict
+        :param tz: local timezone for rollups, defaults to None = no rollups
+        :type tz: tzinfo, optional
+        """
+        rows = zip(*[ columns[name] for name in COLUMNS ])
+        with self.db:
+            self.db.executemany(f"""INSERT INTO hourly (hub, {", ".join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)
+                                    ON CONFLICT (hub, time) DO UPDATE SET
+                                    {", ".join(f"{name}=excluded.{name}" for name in COLUMNS[1:])}""",
+                                ( (id, *row) for row in rows ))
+            if tz and len(columns["time"]):
+                self._update_rollups(id, tz, min(columns["time"]), max(columns["time"]))
+
+
+    def _update_rollups(self, id: str, tz: tzinfo, first: int, last: int):
+        """
+        Internal, recompute rollups of all periods containing the hours from
+        first to last, from the hourly table
+
+        :param id: hub id
+        :type id: str
+        :param tz: local timezone
+        :type tz: tzinfo
+        :param first: first hour, UTC epoch seconds
+        :type first: int
+        :param last: last hour, UTC epoch seconds
+        :type last: int
+        """
+        for resolution in ROLLUP_RESOLUTIONS:
+            # Local periods of first and last hour
+            start = rollups.period_start(rollups.local_day(first, tz), resolution)
+            end   = rollups.next_period(rollups.period_start(rollups.local_day(last, tz), resolution), resolution)
+            sums  = rollups.rollup(self.query(id, rollups.local_day_utc(start, tz), rollups.local_day_utc(end, tz)), tz, resolution)
+            self.db.executemany(f"""INSERT OR REPLACE INTO rollup_{resolution} (hub, {", ".join(rollups.COLUMNS)})
+                                    VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                                ( (id, *row) for row in zip(*[ sums[name] for name in rollups.COLUMNS ]) ))
+
+
+    def rebuild_rollups(self, id: str, tz: tzinfo):
+        """
+        Recompute all rollups of hub, e.g. for data stored without timezone
+
+        :param id: hub id
+        :type id: str
+        :param tz: local timezone
+        :type tz: tzinfo
+        """
+        first, last = self.range(id)
+        with self.db:
+            for resolution in ROLLUP_RESOLUTIONS:
+                self.db.execute(f"DELETE FROM rollup_{resolution} WHERE hub = ?", (id,))
+            if first is not None:
+                self._update_rollups(id, tz, first, last)
+
+
+    def query_rollups(self, id: str, resolution: str, first: int, last: int) -> dict:
+        """
+        Read rollups of hub for range of local days
+
+        :param id: hub id
+        :type id: str
+        :param resolution: "day", "week" or "month"
+        :type resolution: str
+        :param first: first local day number
+        :type first: int
+        :param last: last local day number (exclusive)
+        :type last: int
+        :return: name -> column (array), see module rollups
+        :rtype: dict
+        """
+        sums = rollups.empty_rollup()
+        appends = [ sums[name].append for name in rollups.COLUMNS ]
+        cursor = self.db.execute(f"""SELECT {", ".join(rollups.COLUMNS)} FROM rollup_{resolution}
+                                     WHERE hub = ? AND period >= ? AND period < ? ORDER BY period""",
+                                 (id, first, last))
+        for row in cursor:
+            for append, v in zip(appends, row):
+                append(v)
+        return sums
+
+
+    def has_rollups(self, id: str) -> bool:
+        """
+        Check whether rollups exist for hub
+
+        :param id: hub id
+        :type id: str
+        :return: rollups exist
+        :rtype: bool
+        """
+        return self.db.execute("SELECT 1 FROM rollup_day WHERE hub = ? LIMIT 1", (id,)).fetchone() is not None
+
+
+    def query(self, id: str, start_utc: datetime, end_utc: datetime) -> dict:
+        """
+        Read hours of hub for UTC range
+
+        :param id: hub id
+        :type id: str
+        :param start_utc: start of range
+        :type start_utc: datetime
+        :param end_utc: end of range (exclusive)
+        :type end_utc: datetime
+        :return: name -> column (array), same as jdaydecode.decode_hourly()
+        :rtype: dict
+        """
+        cols = { name: array('q' if name == "time" else 'd') for name in COLUMNS }
+        appends = [ cols[name].append for name in COLUMNS ]
+        cursor = self.db.execute(f"""SELECT {", ".join(COLUMNS)} FROM hourly
+                                     WHERE hub = ? AND time >= ? AND time < ? ORDER BY time""",
+                                 (id, int(start_utc.timestamp()), int(end_utc.timestamp())))
+        for row in cursor:
+            for append, v in zip(appends, row):
+                append(v)
+        return cols
+
+
+    def range(self, id: str) -> tuple:
+        """
+        First and last hour stored for hub
+
+        :param id: hub id
+        :type id: str
+        :return: (first, last) UTC epoch seconds, (None, None) if empty
+        :rtype: tuple
+        """
+        return self.db.execute("SELECT min(time), max(time) FROM hourly WHERE hub = ?", (id,)).fetchone()
+
+
+    def close(self):
+        """
+        Close database
+        """
+        self.db.close()
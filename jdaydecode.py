@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from jdaydecode import decode_hourly
+#   columns = decode_hourly(records)
+#   columns["time"]             UTC epoch seconds, array('q')
+#   columns["import"]           kWh, array('d')
+#   columns["export"]
+#   columns["generation"]
+#   columns["bev"]              sum of h1d, h2d, h3d, h1b, h2b, h3b
+#   record_time(record)         UTC epoch seconds of single record
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       Batch decoder for cgi-jdayhour records, columnar output, uses NumPy
+#       if available
+# Version 0.2 / 2026-10-17
+#       Added record_time()
+# Version 0.3 / 2026-10-17
+#       NumPy is imported on first use
+
+from array import array
+
+# Optional, pure Python fallback if not installed, imported on first use, see
+# _import_numpy(), False = not installed
+np = None
+
+VERSION = "0.3 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "jdaydecode"
+
+
+# Energy values in the JSON records are in joules per hour (hourly data)
+ENERGY_FIELDS = { "import": "imp", "export": "exp", "generation": "gep" }
+BEV_FIELDS    = ("h1d", "h2d", "h3d", "h1b", "h2b", "h3b")
+COLUMNS       = ("time", "import", "export", "generation", "bev")
+
+
+
+def _import_numpy():
+    """
+    Internal, import NumPy on first use, saves startup time for runs not
+    using it
+
+    :return: numpy module, False if not installed
+    """
+    global np
+    if np is None:
+        try:
+            import numpy as np
+        except ImportError:
+            np = False
+    return np
+
+
+
+def days_from_civil(y, m, d):
+    """
+    Days since 1970-01-01 for proleptic Gregorian date, works with int and
+    NumPy int arrays alike (H. Hinnant's algorithm)
+
+    :param y: year
+    :param m: month
+    :param d: day
+    :return: days since epoch
+    """
+    y   = y - (m <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    mp  = (m + 9) % 12
+    doy = (153 * mp + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def record_time(r: dict) -> int:
+    """
+    UTC epoch seconds of JSON record, fields with value 0 are omitted
+
+    :param r: JSON record
+    :type r: dict
+    :return: epoch seconds
+    :rtype: int
+    """
+    return (days_from_civil(int(r.get('yr') or 0), int(r.get('mon') or 0), int(r.get('dom') or 0)) * 86400
+            + int(r.get('hr') or 0) * 3600)
+
+
+def _kwh(joules):
+    """
+    Internal, convert joules to kWh, same operations as the original script
+    to get identical float results
+
+    :param joules: value or NumPy array
+    :return: kWh
+    """
+    return joules / (60*1000) / 60
+
+
+def _decode_python(records: list) -> dict:
+    """
+    Internal, pure Python decoder, single pass over all records
+
+    :param records: JSON records
+    :type records: list
+    :return: columns
+    :rtype: dict
+    """
+    time = array('q')
+    cols = { name: array('d') for name in COLUMNS[1:] }
+    t_append = time.append
+    imp_append, exp_append, gep_append, bev_append = (cols[name].append for name in COLUMNS[1:])
+    days = {}
+    for r in records:
+        ymd = (r.get('yr') or 0, r.get('mon') or 0, r.get('dom') or 0)
+        day = days.get(ymd)
+        if day is None:
+            day = days[ymd] = days_from_civil(*(int(x) for x in ymd)) * 86400
+        t_append(day + int(r.get('hr') or 0) * 3600)
+        imp_append(float(r.get('imp') or 0)/(60*1000)/60)
+        exp_append(float(r.get('exp') or 0)/(60*1000)/60)
+        gep_append(float(r.get('gep') or 0)/(60*1000)/60)
+        bev = 0
+        for f in BEV_FIELDS:
+            bev += float(r.get(f) or 0)/(60*1000)
+        bev_append(bev/60)
+    cols["time"] = time
+    return cols
+
+
+def _decode_numpy(records: list) -> dict:
+    """
+    Internal, NumPy decoder, scaling and summation on whole columns
+
+    :param records: JSON records
+    :type records: list
+    :return: columns
+    :rtype: dict
+    """
+    n = len(records)
+    def column(field, dtype):
+        return np.fromiter((r.get(field) or 0 for r in records), dtype=dtype, count=n)
+
+    days = days_from_civil(column('yr', np.int64), column('mon', np.int64), column('dom', np.int64))
+    time = days * 86400 + column('hr', np.int64) * 3600
+    cols = { "time": array('q', time.astype(np.int64).tobytes()) }
+    for name, field in ENERGY_FIELDS.items():
+        cols[name] = array('d', _kwh(column(field, np.float64)).tobytes())
+    bev = np.zeros(n)
+    for f in BEV_FIELDS:
+        bev += column(f, np.float64) / (60*1000)
+    cols["bev"] = array('d', (bev / 60).tobytes())
+    return cols
+
+
+def decode_hourly(records: list) -> dict:
+    """
+    Decode list of cgi-jdayhour JSON records to columns, see COLUMNS
+
+    :param records: JSON records
+    :type records: list
+    :return: name -> column (array)
+    :rtype: dict
+    """
+    if records and _import_numpy():
+        return _decode_numpy(records)
+    return _decode_python(records)
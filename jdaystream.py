@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from jdaystream import iter_records, decode_minutes, Downsampler
+#   for record in iter_records(response.iter_content(chunk_size)):
+#       ...                                     records parsed incrementally
+#   columns = decode_minutes(records, start, end)
+#   columns["time"]             UTC epoch seconds, array('q')
+#   columns["import"]           kWh, array('d')
+#   columns["export"]
+#   columns["generation"]
+#   columns["bev"]              sum of h1d, h2d, h3d, h1b, h2b, h3b
+#   down = Downsampler(minutes)
+#   columns = down.add(columns)                 completed buckets, columns in time order
+#   columns = down.finish()                     last bucket
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       Incremental parser and decoder for cgi-jday minute records,
+#       downsampling to buckets of several minutes
+
+import codecs
+import json
+import typing
+from array import array
+
+# Local modules
+from jdaydecode import days_from_civil, ENERGY_FIELDS, BEV_FIELDS, COLUMNS
+
+VERSION = "0.1 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "jdaystream"
+
+
+# Energy values in the JSON records are in joules per minute
+JOULES_PER_KWH = 3600 * 1000
+
+_SKIP = " \t\r\n,"
+
+
+
+def iter_records(chunks: typing.Iterable) -> typing.Iterator:
+    """
+    Parse JSON records from the first array of a response incrementally,
+    e.g. { "U12345678": [ {...}, {...}, ... ] }, only the current chunk and
+    the current record are held in memory
+
+    :param chunks: response data, str or bytes (UTF-8)
+    :type chunks: typing.Iterable
+    :return: records (dict)
+    :rtype: typing.Iterator
+    """
+    decoder  = json.JSONDecoder()
+    utf8     = codecs.getincrementaldecoder("utf-8")()
+    buf      = ""
+    in_array = False
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = utf8.decode(chunk)
+        buf += chunk
+        pos = 0
+        while True:
+            if not in_array:
+                pos = buf.find("[", pos)
+                if pos < 0:
+                    pos = len(buf)
+                    break
+                pos += 1
+                in_array = True
+            while pos < len(buf) and buf[pos] in _SKIP:
+                pos += 1
+            if pos >= len(buf):
+                break
+            if buf[pos] == "]":
+                return
+            try:
+                record, pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                # Incomplete record, wait for next chunk
+                break
+            yield record
+        buf = buf[pos:]
+
+
+def decode_minutes(records: typing.Iterable, start: int=None, end: int=None) -> dict:
+    """
+    Decode cgi-jday minute records to columns, see COLUMNS, single pass
+
+    :param records: JSON records
+    :type records: typing.Iterable
+    :param start: skip records before UTC epoch seconds, defaults to None
+    :type start: int, optional
+    :param end: skip records from UTC epoch seconds, defaults to None
+    :type end: int, optional
+    :return: name -> column (array)
+    :rtype: dict
+    """
+    time = array('q')
+    cols = { name: array('d') for name in COLUMNS[1:] }
+    appends = [ cols[name].append for name in ENERGY_FIELDS ]
+    fields  = list(ENERGY_FIELDS.values())
+    bev_append = cols["bev"].append
+    days = {}
+    for r in records:
+        ymd = (r.get('yr') or 0, r.get('mon') or 0, r.get('dom') or 0)
+        day = days.get(ymd)
+        if day is None:
+            day = days[ymd] = days_from_civil(*(int(x) for x in ymd)) * 86400
+        t = day + int(r.get('hr') or 0) * 3600 + int(r.get('min') or 0) * 60
+        if (start is not None and t < start) or (end is not None and t >= end):
+            continue
+        time.append(t)
+        for append, f in zip(appends, fields):
+            append(float(r.get(f) or 0) / JOULES_PER_KWH)
+        bev_append(sum(float(r.get(f) or 0) for f in BEV_FIELDS) / JOULES_PER_KWH)
+    cols["time"] = time
+    return cols
+
+
+
+class Downsampler:
+    """
+    Sum minute data to buckets of several minutes, aligned to UTC (and to
+    local time for all timezones with full hour offsets), buckets spanning
+    several chunks are merged
+    """
+
+    def __init__(self, minutes: int):
+        """
+        Create downsampler
+
+        :param minutes: bucket size in minutes
+        :type minutes: int
+        """
+        self.size     = minutes * 60
+        self._pending = None        # last bucket, list of values in COLUMNS order
+
+
+    def add(self, columns: dict) -> dict:
+        """
+        Add minute data, chunks in time order
+
+        :param columns: minute columns
+        :type columns: dict
+        :return: columns of completed buckets, time = start of bucket
+        :rtype: dict
+        """
+        rows = []
+        row  = self._pending
+        size = self.size
+        for values in zip(*[ columns[name] for name in COLUMNS ]):
+            t = values[0] - values[0] % size
+            if row and row[0] == t:
+                for i in range(1, len(row)):
+                    row[i] += values[i]
+            else:
+                if row:
+                    rows.append(row)
+                row = [ t ] + list(values[1:])
+        self._pending = row
+        return self._columns(rows)
+
+
+    def finish(self) -> dict:
+        """
+        No more data, return last bucket
+
+        :return: columns
+        :rtype: dict
+        """
+        rows = [ self._pending ] if self._pending else []
+        self._pending = None
+        return self._columns(rows)
+
+
+    def _columns(self, rows: list) -> dict:
+        """
+        Internal, rows to columns
+
+        :param rows: rows in COLUMNS order
+        :type rows: list
+        :return: columns
+        :rtype: dict
+        """
+        cols = { name: array('q' if name == "time" else 'd') for name in COLUMNS }
+        for row in rows:
+            for name, v in zip(COLUMNS, row):
+                cols[name].append(v)
+        return cols
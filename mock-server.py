@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   mock-server.py [-p PORT] [--latency MS] [--error-rate P] [--rate N] ...
+#   myenergi-zappi2.py --director http://localhost:8080 ...
+#   test-server.py --director http://localhost:8080
+#
+# Local stand-in for the Myenergi director and API server, for load and
+# latency tests without credentials and network. The same server answers
+# director lookups (X_MYENERGI-asn header pointing to itself) and API
+# requests, all with digest auth:
+#   cgi-jdayhour-ID-YYYY-M-D-H-N    hourly records, N hours from UTC hour
+#   cgi-jday-ID-YYYY-M-D            minute records of UTC day
+# Records are synthetic but deterministic per serial and UTC time (solar
+# generation, household import/export, nightly BEV charging), in joules,
+# fields with value 0 omitted, and end with the current hour like the real
+# API. As the API works in UTC, windows around DST changes of the hub's
+# local timezone are served like any other window.
+#
+# Without --config any serial is accepted with the --password API key,
+# with --config only the hubs configured in .myenergi.cfg.
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       Mock director and API server with digest auth, synthetic hourly and
+#       minute records, configurable latency, errors, 429 throttling, max
+#       window size and record gaps
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import secrets
+import signal
+import threading
+import time
+from configparser import ConfigParser
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local modules
+from verbose import message, verbose, warning
+
+global VERSION, AUTHOR, NAME
+VERSION = "0.1 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "mock-server"
+
+
+
+DEFAULT_PORT     = 8080
+DEFAULT_PASSWORD = "mock"
+REALM            = "MyEnergi Telemetry"
+JOULES_PER_KWH   = 3600 * 1000
+DAYS_OF_WEEK     = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+RE_JDAYHOUR = re.compile(r"^/cgi-jdayhour-([A-Z])(\d+)-(\d+)-(\d+)-(\d+)-(\d+)-(\d+)$")
+RE_JDAY     = re.compile(r"^/cgi-jday-([A-Z])(\d+)-(\d+)-(\d+)-(\d+)$")
+RE_AUTH     = re.compile(r'(\w+)=(?:"([^"]*)"|([^,\s]*))')
+
+
+
+class MockState:
+    # Options, counters and random faults shared by all request threads
+
+    def __init__(self, args, users):
+        self.args     = args
+        self.users    = users               # serial -> password, None = any serial
+        self.nonce    = secrets.token_hex(16)
+        self.opaque   = secrets.token_hex(16)
+        self.random   = random.Random(args.seed)
+        self.lock     = threading.Lock()
+        self.buckets  = {}                  # serial -> [tokens, last update]
+        self.counters = { "requests": 0, "records": 0, "bytes": 0 }
+        self.status   = {}                  # status code -> count
+        self.start    = time.monotonic()
+
+    def chance(self, p):
+        # True with probability p
+        if p <= 0:
+            return False
+        with self.lock:
+            return self.random.random() < p
+
+    def latency(self):
+        # Response delay in s
+        with self.lock:
+            jitter = self.random.uniform(-self.args.jitter, self.args.jitter) if self.args.jitter else 0
+        return max(self.args.latency + jitter, 0) / 1000
+
+    def throttled(self, serial):
+        # Token bucket per serial, --rate requests per second, burst 2 * rate
+        rate = self.args.rate
+        if not rate:
+            return False
+        burst = max(int(rate * 2), 1)
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.get(serial, (burst, now))
+            tokens = min(tokens + (now - last) * rate, burst)
+            if tokens < 1:
+                self.buckets[serial] = (tokens, now)
+                return True
+            self.buckets[serial] = (tokens - 1, now)
+            return False
+
+    def count(self, status, records=0, size=0):
+        with self.lock:
+            self.counters["requests"] += 1
+            self.counters["records"]  += records
+            self.counters["bytes"]    += size
+            self.status[status] = self.status.get(status, 0) + 1
+
+    def summary(self):
+        elapsed = time.monotonic() - self.start
+        with self.lock:
+            n = self.counters["requests"]
+            message(f"{n} requests in {elapsed:.1f} s ({n / elapsed if elapsed else 0:.1f}/s),",
+                    self.counters["records"], "records,", self.counters["bytes"], "bytes")
+            message("status codes:", ", ".join(f"{code}: {count}" for code, count in sorted(self.status.items())) or "-")
+
+
+
+def noise(serial, t):
+    # Deterministic pseudo-random value 0 <= x < 1 for serial and time
+    h = hashlib.blake2b(f"{serial}-{t}".encode(), digest_size=8).digest()
+    return int.from_bytes(h, "little") / 2**64
+
+
+
+def energy(serial, t, seconds):
+    # Synthetic energy values in joules for interval [t, t + seconds), dict
+    # of API field names
+    hour = (t % 86400) / 3600
+    day  = t // 86400
+    kwh  = seconds / 3600
+    # Solar generation, peak 5 kW at 12:00 UTC, varying by day
+    sun  = max(math.sin(math.pi * (hour - 6) / 12), 0) * (0.4 + 0.6 * noise(serial, day))
+    gen  = 5.0 * sun * kwh
+    load = (0.3 + 0.7 * noise(serial, t)) * kwh
+    # BEV charging 7.4 kW 01:00-04:00 UTC every third day
+    bev  = 7.4 * kwh if 1 <= hour < 4 and noise(serial, -day) < 1/3 else 0
+    net  = load + bev - gen
+    return { "imp": round(max(net, 0) * JOULES_PER_KWH),
+             "exp": round(max(-net, 0) * JOULES_PER_KWH),
+             "gep": round(gen * JOULES_PER_KWH),
+             "h1d": round(bev * JOULES_PER_KWH) }
+
+
+
+def record(serial, t, seconds):
+    # API record for interval starting at t (UTC epoch), fields with value 0
+    # are omitted like in the real API
+    d = datetime.fromtimestamp(t, tz=timezone.utc)
+    r = { "yr": d.year, "mon": d.month, "dom": d.day, "dow": DAYS_OF_WEEK[d.weekday()],
+          "hr": d.hour, "min": d.minute }
+    r.update(energy(serial, t, seconds))
+    return { k: v for k, v in r.items() if v }
+
+
+
+def records(state, serial, start, count, seconds):
+    # List of records for count intervals from start, up to the current
+    # interval, with random gaps
+    now = time.time()
+    result = []
+    for i in range(count):
+        t = start + i * seconds
+        if t > now:
+            break
+        if state.chance(state.args.gap_rate):
+            continue
+        result.append(record(serial, t, seconds))
+    return result
+
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    # Request handler, director and API server
+    protocol_version = "HTTP/1.1"
+    server_version   = NAME + "/" + VERSION.split()[0]
+    state            = None             # MockState
+
+    def log_message(self, format, *args):
+        verbose(self.address_string(), format % args)
+
+    def send(self, status, body=None, headers={}, records=0):
+        data = json.dumps(body, separators=(",", ":")).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("x-request-id", secrets.token_hex(8))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        self.state.count(status, records, len(data))
+
+    def authenticate(self):
+        # Digest auth (MD5, qop=auth), returns user name or None
+        auth = self.headers.get("Authorization", "")
+        if not auth.startswith("Digest "):
+            return None
+        p = { k: v1 if v1 else v2 for k, v1, v2 in RE_AUTH.findall(auth[7:]) }
+        user = p.get("username")
+        if self.state.users is None:
+            password = self.state.args.password
+        else:
+            password = self.state.users.get(user)
+        if not user or password is None or p.get("nonce") != self.state.nonce or p.get("uri") != self.path:
+            return None
+        md5 = lambda s: hashlib.md5(s.encode()).hexdigest()
+        ha1 = md5(f"{user}:{REALM}:{password}")
+        ha2 = md5(f"GET:{self.path}")
+        if p.get("qop"):
+            expected = md5(f"{ha1}:{self.state.nonce}:{p.get('nc')}:{p.get('cnonce')}:{p.get('qop')}:{ha2}")
+        else:
+            expected = md5(f"{ha1}:{self.state.nonce}:{ha2}")
+        return user if secrets.compare_digest(expected, p.get("response", "")) else None
+
+    def do_GET(self):
+        state = self.state
+        args  = state.args
+        user  = self.authenticate()
+        if not user:
+            self.send(401, headers={ "WWW-Authenticate": f'Digest realm="{REALM}", qop="auth", algorithm="MD5", '
+                                                         f'nonce="{state.nonce}", opaque="{state.opaque}"' })
+            return
+        time.sleep(state.latency())
+        if state.throttled(user) or state.chance(args.throttle_rate):
+            self.send(429, { "errors": "Too many requests" }, { "Retry-After": str(args.retry_after) })
+            return
+        if state.chance(args.error_rate):
+            with state.lock:
+                status = state.random.choice((500, 502, 503))
+            self.send(status, { "errors": "Internal server error" })
+            return
+
+        m = RE_JDAYHOUR.match(self.path)
+        if m:
+            _, serial, y, mon, d, h, n = m.groups()
+            try:
+                start = datetime(int(y), int(mon), int(d), int(h), tzinfo=timezone.utc)
+            except ValueError:
+                self.send(400, { "errors": "Invalid date" })
+                return
+            if args.max_hours and int(n) > args.max_hours:
+                self.send(400, { "errors": f"Too many hours, max {args.max_hours}" })
+                return
+            data = records(state, serial, int(start.timestamp()), int(n), 3600)
+            self.send(200, { "U" + serial: data }, records=len(data))
+            return
+
+        m = RE_JDAY.match(self.path)
+        if m:
+            _, serial, y, mon, d = m.groups()
+            try:
+                start = datetime(int(y), int(mon), int(d), tzinfo=timezone.utc)
+            except ValueError:
+                self.send(400, { "errors": "Invalid date" })
+                return
+            data = records(state, serial, int(start.timestamp()), 1440, 60)
+            self.send(200, { "U" + serial: data }, records=len(data))
+            return
+
+        # Everything else is a director lookup, API server is this server or --asn
+        self.send(200, {}, { "X_MYENERGI-asn": args.asn or self.headers.get("Host") or f"localhost:{args.port}" })
+
+
+
+def read_users(file):
+    # serial -> password from [hub] and [hub:NAME] sections of config file
+    config = ConfigParser()
+    if not config.read(file):
+        warning("config file not found:", file)
+    return { config.get(s, "serial"): config.get(s, "password")
+             for s in config.sections() if s == "hub" or s.startswith("hub:") }
+
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Mock Myenergi director and API server for offline testing",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages, log requests")
+    arg.add_argument("-b", "--bind", default="localhost", help="bind address (default localhost)")
+    arg.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help=f"port (default {DEFAULT_PORT})")
+    arg.add_argument("-c", "--config", nargs="?", const=".myenergi.cfg", help="accept hubs from config file only (default .myenergi.cfg)")
+    arg.add_argument("--password", default=DEFAULT_PASSWORD, help=f"API key for any serial without --config (default {DEFAULT_PASSWORD})")
+    arg.add_argument("--asn", help="API server HOST:PORT returned by director (default this server)")
+    arg.add_argument("--latency", type=float, default=0, help="response latency in ms (default 0)")
+    arg.add_argument("--jitter", type=float, default=0, help="random +/- variation of latency in ms (default 0)")
+    arg.add_argument("--error-rate", type=float, default=0, help="probability of 5xx responses (default 0)")
+    arg.add_argument("--throttle-rate", type=float, default=0, help="probability of 429 responses (default 0)")
+    arg.add_argument("--rate", type=float, default=0, help="max requests per second and serial, 429 above, 0 = unlimited (default 0)")
+    arg.add_argument("--retry-after", type=int, default=1, help="Retry-After header of 429 responses in s (default 1)")
+    arg.add_argument("--gap-rate", type=float, default=0, help="probability of missing records (default 0)")
+    arg.add_argument("--max-hours", type=int, default=0, help="reject cgi-jdayhour windows of more hours, 0 = unlimited (default 0)")
+    arg.add_argument("--seed", type=int, help="random seed for reproducible faults")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+
+    users = read_users(args.config) if args.config else None
+    MockHandler.state = MockState(args, users)
+    server = ThreadingHTTPServer((args.bind, args.port), MockHandler)
+    server.daemon_threads = True
+    message(f"Mock server listening on http://{args.bind}:{server.server_port}/")
+    # Stop with summary on Ctrl-C or kill
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    MockHandler.state.summary()
+
+
+
+
+if __name__ == "__main__":
+    main()
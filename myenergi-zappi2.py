@@ -38,35 +38,169 @@
 #       Refactored to use zoneinfo, tzdata instead of pytz
 # Version 0.4 / 2024-08-01
 #       Use new module csvoutput
+# Version 0.5 / 2026-10-17
+#       New option -j --jobs for concurrent retrieval of months
+# Version 0.6 / 2026-10-17
+#       Use shared session from module myenergiapi for all API calls
+# Version 0.7 / 2026-10-17
+#       Cache cgi-jdayhour records on disk (module responsecache), new options
+#       --refresh, --no-cache, --cache-dir
+# Version 0.8 / 2026-10-17
+#       API server from director cache with TTL (new option --director-ttl),
+#       automatic failover on redirect or connection error
+# Version 0.9 / 2026-10-17
+#       New option -S --stream, write CSV rows while retrieving data
+# Version 0.10 / 2026-10-17
+#       Use columnar mode of csv_output
+# Version 0.11 / 2026-10-17
+#       Decode records with jdaydecode.decode_hourly()
+# Version 0.12 / 2026-10-17
+#       Convert timestamps to local time with tzoffsets.TZOffsets
+# Version 0.13 / 2026-10-17
+#       --start/--end down to the day or hour, request windows planned by
+#       module windowplanner, new option --max-hours
+# Version 0.14 / 2026-10-17
+#       Experimental asyncio engine, removed in 0.28, see 0.39
+# Version 0.15 / 2026-10-17
+#       Multiple [hub:NAME] sections in config, retrieved concurrently, new
+#       options --hub, --split, --per-hub
+# Version 0.16 / 2026-10-17
+#       Rate limiting, retries with backoff, circuit breaker (module
+#       requestscheduler), failed windows are retried, new options --rate,
+#       --retries, fixed error output for failed requests
+# Version 0.17 / 2026-10-17
+#       New option --sync, incremental retrieval of new hours only, with
+#       resumable journal per hub (module syncjournal)
+# Version 0.18 / 2026-10-17
+#       New options --daemon, --interval, poll for new hours continuously,
+#       sync retrieves complete hours only
+# Version 0.19 / 2026-10-17
+#       New option -a --append, append new rows to existing CSV output, used
+#       by --sync and --daemon
+# Version 0.20 / 2026-10-17
+#       New options --db, store hourly data in SQLite database (module
+#       hourstore), and -Q --query, output from database without retrieval
+# Version 0.21 / 2026-10-17
+#       New option --resolution hour|day|week|month, rollups by local period
+#       (module rollups), maintained in the database with --db
+# Version 0.22 / 2026-10-17
+#       New option -m --minutes, minute data from cgi-jday, parsed while
+#       receiving (module jdaystream), optionally summed to buckets of several
+#       minutes, bounded number of windows retrieved ahead
+# Version 0.23 / 2026-10-17
+#       New option -F --format csv|packed|parquet|arrow, binary output with
+#       UTC time column (module binaryoutput)
+# Version 0.24 / 2026-10-17
+#       New option --director, e.g. for testing with mock-server.py
+# Version 0.25 / 2026-10-17
+#       New option --stats, timers and counters for director lookup, HTTP,
+#       JSON parsing, decoding, timezone conversion, database and output
+# Version 0.26 / 2026-10-17
+#       Faster startup, icecream imported with --debug only, requests on the
+#       first request, no explicit tzdata import (used by zoneinfo if there
+#       is no system timezone data)
+# Version 0.27 / 2026-10-17
+#       Hours missing in a response are detected (windowplanner.find_gaps)
+#       and requested once more in minimal windows, cached windows with gaps
+#       refetch the missing hours only, new option --gaps skip|zero|mark
+# Version 0.28 / 2026-10-17
+#       Removed options --engine, --per-host: the asyncio engine ran the
+#       blocking requests in a thread pool, no gain over the default engine
+# Version 0.29 / 2026-10-17
+#       --per-hub defaults to --jobs, a single hub uses all jobs
+# Version 0.30 / 2026-10-17
+#       Only windows failed with transient errors are retried, with backoff
+#       and jitter or after the circuit breaker's reset timeout, other
+#       errors fail at once
+# Version 0.31 / 2026-10-17
+#       Status 400 for cgi-jdayhour rejects the window size, only then the
+#       window is split
+# Version 0.32 / 2026-10-17
+#       Gaps close to each other are requested together, at most 2 requests
+#       per window, hours still missing after SYNC_DELAY are not requested
+#       again, neither by later runs nor daemon cycles
+# Version 0.33 / 2026-10-17
+#       Date column stored as UTC epoch seconds, formatted as local time when
+#       written, except for combined output of hubs in different timezones
+# Version 0.34 / 2026-10-17
+#       bytes stat counts bytes received (compressed), not the decoded size
+# Version 0.35 / 2026-10-17
+#       Windows not aligned with local months (--start/--end with day or
+#       hour, --max-hours below a month) are served from the cached month
+# Version 0.36 / 2026-10-17
+#       Append mode compares UTC times, the repeated hour at the end of DST
+#       is no longer taken for a row already present, combined output is
+#       read back until all hubs have a last row
+# Version 0.37 / 2026-10-17
+#       Sync journal starts at --start, windows failing on the first sync
+#       are retrieved by the next one
+# Version 0.38 / 2026-10-17
+#       Readable error for failed director lookups
+# Version 0.39 / 2026-10-17
+#       New options --engine threads|async, --per-host: asyncio engine with
+#       aiohttp (optional), connection limit per API server, window logic
+#       shared with the threads engine as generators of requests
 
-import requests
 import json
-from datetime import datetime, timezone, date
-from zoneinfo import ZoneInfo
-from requests.auth import HTTPDigestAuth
+import math
+import random
+from array import array
+from datetime import datetime, timezone, date, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from configparser import ConfigParser
 import locale
 import argparse
 import re
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice, chain
 
 # The following libs must be installed with pip
-# tzdata required on Windows for IANA timezone names!
-import tzdata
-from icecream import ic
-# Disable debugging
-ic.disable()
+# tzdata required on Windows for IANA timezone names! (used by zoneinfo
+# automatically, no import)
+# icecream for debugging, imported with --debug only, see enable_debug()
+# aiohttp optional, for --engine async only, imported on first use (asyncfetch)
 # Local modules
-from verbose import verbose, warning, error
+from verbose import verbose, warning, error, stats
 from csvoutput import csv_output
+from binaryoutput import packed_output, arrow_output
+from asyncfetch import AsyncEngine, run_steps as async_run_steps
+from myenergiapi import MyenergiAPI, DirectorError, DEFAULT_DIRECTOR_TTL, DIRECTOR_URL
+from responsecache import response_cache, DEFAULT_CACHE_DIR
+from jdaydecode import decode_hourly, record_time, COLUMNS
+from requestscheduler import scheduler, TransientError, DEFAULT_RATE, DEFAULT_RETRIES
+from windowplanner import plan_windows, local_month_starts, local_month_window, hours_between, find_gaps, merge_gaps, WindowDispatcher, WindowRejectedError, run_steps, DEFAULT_MAX_HOURS, HOUR, DEFAULT_GAP_DISTANCE, DEFAULT_GAP_WINDOWS
+from tzoffsets import TZOffsets
+from syncjournal import SyncJournal
+from hourstore import HourStore, DEFAULT_DB_FILE
+from rollups import RollupAccumulator, RESOLUTIONS, period_start, period_dates, local_day
+from jdaystream import iter_records, decode_minutes, Downsampler
 
 
 global VERSION, AUTHOR, NAME
-VERSION = "0.4 / 2024-08-01"
+VERSION = "0.39 / 2026-10-17"
 AUTHOR  = "Martin Junius"
 NAME    = "myenergi-zappi2"
 
 
 
+# Debugging disabled: ic() does nothing, icecream (with pygments, executing,
+# asttokens, colorama) isn't loaded. Check ic.enabled before calls in loops,
+# to avoid evaluating the arguments.
+def ic(*args):
+    pass
+ic.enabled = False
+
+def enable_debug():
+    global ic
+    from icecream import ic
+    ic.enable()
+
+
+
 # Read .ini file for secrets, same format as used by the pymyenergi library with some additions
 #
 # [hub]
@@ -76,9 +210,48 @@ NAME    = "myenergi-zappi2"
 # id=E12345678      # "E" for Eddi + serial
 # timezone=Europe/Berlin
 # locale=
+#
+# More hubs in sections [hub:NAME] with the same keys, locale is taken from
+# the first hub section only
+
+DEFAULT_INTERVAL = 300
+# Output formats and default file extension
+FORMATS          = { "csv": ".csv", "packed": ".bin", "parquet": ".parquet", "arrow": ".arrow" }
+MINUTES          = (1, 5, 10, 15, 20, 30, 60)
+# Value for hours without data in hourly output, None = no row
+GAPS             = { "skip": None, "zero": 0.0, "mark": math.nan }
+# Engines for retrieving hourly data
+ENGINES          = ("threads", "async")
+
+class Hub:
+    def __init__(self, name, username, password, id, timezone):
+        self.name     = name
+        self.username = username
+        self.password = password
+        self.id       = id
+        self.timezone = timezone
+        # Per hub limit for concurrent requests, see set_limit()
+        self.limit    = threading.BoundedSemaphore(1)
+        # UTC epoch seconds of hours known to be missing, not requested again
+        self.missing  = set()
+        # Splits windows if the server rejects or truncates responses
+        self.dispatcher = WindowDispatcher(lambda start_utc, num_hours: retrieve_hourly_records(self, start_utc, num_hours))
+
+    def set_limit(self, n):
+        self.limit = threading.BoundedSemaphore(n)
+
+    def api(self, pool_size=1):
+        return MyenergiAPI.hub(self.username, self.password, pool_size=pool_size)
+
+    def __repr__(self):
+        return f"Hub({self.name}, {self.id}, {self.timezone})"
+
+
 
 class Config(ConfigParser):
     filename = None
+    hubs     = []
+    # First hub
     username = None
     password = None
     id       = None
@@ -93,110 +266,551 @@ class Config(ConfigParser):
     def read(self, file):
         Config.filename = file
         super().read(file)
-        Config.username = self.get("hub", "serial")
-        Config.password = self.get("hub", "password")
-        Config.id       = self.get("hub", "id")
-        Config.timezone = ZoneInfo(self.get("hub", "timezone"))
-        csv_output.set_default_locale(self.get("hub", "locale"))
-        ic(Config.username, Config.password, Config.id, Config.timezone, locale.getlocale(), locale.localeconv())
+        sections = [ s for s in self.sections() if s == "hub" or s.startswith("hub:") ]
+        if not sections:
+            error("no [hub] section in config", file)
+        try:
+            Config.hubs = [ Hub(s.partition(":")[2] or s,
+                                self.get(s, "serial"),
+                                self.get(s, "password"),
+                                self.get(s, "id"),
+                                ZoneInfo(self.get(s, "timezone")))   for s in sections ]
+        except ZoneInfoNotFoundError as e:
+            error("unknown timezone in config", file + ":", e, "(on Windows: pip install tzdata)")
+        first = Config.hubs[0]
+        Config.username = first.username
+        Config.password = first.password
+        Config.id       = first.id
+        Config.timezone = first.timezone
+        csv_output.set_default_locale(self.get(sections[0], "locale", fallback=""))
+        ic(Config.hubs, locale.getlocale(), locale.localeconv())
 
 
 
-def retrieve_api_server():
-    # Based on code snippet from https://myenergi.info/viewtopic.php?p=29050#p29050, user DougieL
-    director_url = "https://director.myenergi.net"
-    verbose("Director:", director_url)
-    response = requests.get(director_url, auth=HTTPDigestAuth(Config.username, Config.password))
-    verbose(response)
-    api_server = response.headers['X_MYENERGI-asn']
+def retrieve_api_server(hub):
+    # Director lookup, cached by MyenergiAPI
+    try:
+        api_server = hub.api().api_server()
+    except DirectorError as e:
+        error(f"{hub.name}: {e}, check serial number and API key")
 
-    verbose("API server:", api_server)
+    verbose("API server:", hub.name, api_server)
     return api_server
 
 
 
-def retrieve_month_hourly(api_server, year, month):
-    # Start first day of month at 0h *local* time
-    local_year  = year
-    local_month = month
-    local_day   = 1
-    local_hour  = 0
-
-    # Convert start date and time to UTC
-    start_datetime_local = datetime(local_year, local_month, local_day, local_hour, tzinfo=Config.timezone)
-    start_datetime_utc   = start_datetime_local.astimezone(tz=timezone.utc)
-    utc_year             = start_datetime_utc.year
-    utc_month            = start_datetime_utc.month
-    utc_day              = start_datetime_utc.day
-    utc_hour             = start_datetime_utc.hour
+async def retrieve_api_server_async(engine, hub):
+    # Async engine: same as retrieve_api_server(), returns DirectorError
+    # instead of exiting, with all lookups done
+    try:
+        api_server = await engine.api_server(hub.api())
+    except DirectorError as e:
+        return e
+    verbose("API server:", hub.name, api_server)
+    return api_server
 
-    start_next_month_local = datetime(local_year + (local_month // 12), (local_month % 12) + 1, local_day, local_hour, tzinfo=Config.timezone)
-    start_next_month_utc = start_next_month_local.astimezone(tz=timezone.utc)
-  
-    # Calculate hours in the month, which is tricky with DST involved
-    # Always calculate ABSOLUTE delta using UTC, otherwise DST switching incurs a wrong result!
-    # The old pytz library works differently with local timezone than zoneinfo used here!
-    num_hours = (start_next_month_utc - start_datetime_utc).total_seconds() / 3600
-    ic(start_next_month_local, start_datetime_local, start_next_month_utc, start_datetime_utc, num_hours)
 
-    ##MJ: API only allows a certain numbe of hours, 9999 was too much
 
-    id = Config.id
-    verbose("Collecting", num_hours, "hours starting from:", start_datetime_local, "(local),", start_datetime_utc, "(UTC)")
+HOURLY_HEADERS = {'Content-Type': 'application/json', 'Accept': 'application/json'}
 
-    url = "https://" + api_server + "/cgi-jdayhour-" + id + '-' + str(utc_year) + '-' + str(utc_month) + '-' + str(utc_day) + '-' + str(utc_hour) + '-' + str(num_hours)
+def hourly_url(hub, start_datetime_utc, num_hours):
+    # URL path of cgi-jdayhour request for num_hours starting at start_datetime_utc
+    url = "cgi-jdayhour-" + hub.id + '-' + str(start_datetime_utc.year) + '-' + str(start_datetime_utc.month) + '-' + str(start_datetime_utc.day) + '-' + str(start_datetime_utc.hour) + '-' + str(int(num_hours))
     verbose("URL:", url)
+    return url
 
-    headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
-    r = requests.get(url, auth = HTTPDigestAuth(Config.username,Config.password), headers = headers, timeout = 60)
 
+
+def retrieve_hourly_records(hub, start_datetime_utc, num_hours):
+    # Returns list of JSON records for num_hours starting at start_datetime_utc,
+    # None if the request failed, raises WindowRejectedError if the server
+    # rejects the window
+    with hub.limit:
+        r = hub.api().get_api(hourly_url(hub, start_datetime_utc, num_hours), headers = HOURLY_HEADERS)
+    # Read body, for the bytes received (compressed with gzip Content-Encoding)
+    r.content
+    return hourly_records(hub, r, r.raw.tell())
+
+
+
+def hourly_records(hub, r, size):
+    # Returns list of JSON records from cgi-jdayhour response r with size
+    # bytes received, same as retrieve_hourly_records(), for both engines
+    id = hub.id
+    if r.status_code == 400:
+        # Bad request, e.g. too many hours, the dispatcher splits the window
+        raise WindowRejectedError(r.text[:200])
     if r.status_code == 200:
-        if id[0] == 'Z':
-            verbose("success - Zappi")
+        stats.count("bytes", size)
+        with stats.timer("json"):
             data = json.loads(r.content)
-            ##DEBUG: received JSON
-            # print("JSON =", json.dumps(data, indent=4))
-            rec='U' + id[1:] #No idea why my response is with a U and not a Z, this may be the case for everyone, or may need altering?
-            for data1 in data[rec]:
-                # if i >= len(data[rec]):     ## MJ: fixed, if hourly data for complete month isn't available
-                #     break            
-                hr       = int(data1.get('hr') or 0)
-                yr       = int(data1.get('yr') or 0)
-                mon      = int(data1.get('mon') or 0)
-                dom      = int(data1.get('dom') or 0)
-                y_import = float(data1.get('imp') or 0)/(60*1000)
-                y_gep    = float(data1.get('gep') or 0)/(60*1000)
-                y_exp    = float(data1.get('exp') or 0)/(60*1000)
-                y_z1     = float(data1.get('h1d') or 0)/(60*1000)
-                y_z2     = float(data1.get('h2d') or 0)/(60*1000)
-                y_z3     = float(data1.get('h3d') or 0)/(60*1000)
-                y_z1b    = float(data1.get('h1b') or 0)/(60*1000)
-                y_z2b    = float(data1.get('h2b') or 0)/(60*1000)
-                y_z3b    = float(data1.get('h3b') or 0)/(60*1000)
-                # from original script, Zappi charging only fills h1d, h2d, h3d
-                y_zappi  = y_z1 + y_z2 + y_z3 + y_z1b + y_z2b + y_z3b
-
-                daily_import=y_import/60
-                daily_export=y_exp/60
-                daily_EV=y_zappi/60
-                ## doesn't work for me as generation is always 0, my Zappi can only measure import/export
-                # daily_generation=y_gep/60
-                # daily_self_consumption = daily_generation - daily_export
-                # daily_property_usage=daily_import + daily_self_consumption
-                # daily_green_percentage = (daily_self_consumption / daily_property_usage)*100
-
-                # convert from UTC date/time in JSON output
-                localdt = datetime(yr, mon, dom, hr, tzinfo=timezone.utc).astimezone(tz=Config.timezone)
-                # ic(localdt, daily_import, daily_export, daily_EV)
-                csv_output.add_row([localdt.strftime("%x %X"), daily_import, daily_export, daily_EV])
-        else:
-            print ('Error: unknown ID prefix provided.')
+        ##DEBUG: received JSON
+        # print("JSON =", json.dumps(data, indent=4))
+        rec='U' + id[1:] #No idea why my response is with a U and not a Z, this may be the case for everyone, or may need altering?
+        return data[rec]
+    else:
+        # Error responses are not necessarily JSON
+        try:
+            errors = json.loads(r.content)["errors"]
+        except (ValueError, KeyError, TypeError):
+            errors = r.text[:200]
+        warning("Failed to read ticket, status code", r.status_code, "x-request-id", r.headers.get('x-request-id'), "errors", errors)
+        return None
+
+
+
+# Gaps in a response are requested once more, gaps less than GAP_DISTANCE
+# hours apart in one request, at most GAP_WINDOWS requests per window
+GAP_RETRIES  = 1
+GAP_DISTANCE = DEFAULT_GAP_DISTANCE
+GAP_WINDOWS  = DEFAULT_GAP_WINDOWS
+
+def load_cached_records(hub, start_datetime_utc, num_hours):
+    # Returns (records, complete, missing) from the response cache, windows
+    # not aligned with local months are sliced from the cached window of the
+    # local month containing them, if there is no entry for the window itself
+    records, complete, missing = response_cache.load(hub.id, start_datetime_utc, num_hours)
+    if records is not None:
+        return records, complete, missing
+    month_start, month_hours = local_month_window(start_datetime_utc, hub.timezone)
+    end_datetime_utc = start_datetime_utc + timedelta(hours=num_hours)
+    if month_start == start_datetime_utc and month_hours == num_hours or end_datetime_utc > month_start + timedelta(hours=month_hours):
+        return None, False, []
+    records, complete, missing = response_cache.load(hub.id, month_start, month_hours)
+    if records is None:
+        return None, False, []
+    start, end = int(start_datetime_utc.timestamp()), int(end_datetime_utc.timestamp())
+    verbose("Using cached month from", month_start.astimezone(hub.timezone))
+    return ([ data1 for data1 in records if start <= record_time(data1) < end ], complete,
+            [ t for t in missing if start <= t < end ])
+
+
+
+def cached_records_steps(hub, start_datetime_utc, num_hours):
+    # Returns list of JSON records for the UTC window, closed windows are
+    # served from the response cache, for open windows and windows with gaps
+    # only the missing hours are requested, starting with the last cached
+    # (possibly incomplete) hour. Hours still missing after the retry are
+    # final after SYNC_DELAY (like the sync journal), they are not requested
+    # again (hub.missing, stored in the cache).
+    # Generator of the requests, see windowplanner.WindowDispatcher.steps()
+    id = hub.id
+    end_datetime_utc = start_datetime_utc + timedelta(hours=num_hours)
+
+    records, complete, missing = load_cached_records(hub, start_datetime_utc, num_hours)
+    if records is not None and complete:
+        verbose("Using cached", len(records), "records")
+        return records
+    hub.missing.update(missing)
+
+    if records:
+        last = record_time(records[-1])
+        records = [ data1 for data1 in records if record_time(data1) < last ]
+        gaps = find_gaps(chain(map(record_time, records), hub.missing), start_datetime_utc, num_hours)
+        verbose("Using cached", len(records), "records, refetching", sum(n for s, n in gaps), "hours")
+        windows = merge_gaps(gaps, GAP_DISTANCE, GAP_WINDOWS)
     else:
-        print ("Failed to read ticket, errors are displayed below,")
-        response = json.loads(r.content)
-        print(response["errors"])
-        print("x-request-id : " + r.headers['x-request-id'])
-        print("Status Code : " + r.status_code)
+        records = []
+        windows = [ (start_datetime_utc, num_hours) ]
+
+    by_time = { record_time(data1): data1 for data1 in records }
+    retries = GAP_RETRIES
+    failed  = False
+    while True:
+        for start, hours in windows:
+            try:
+                new_records = yield from hub.dispatcher.steps(start, hours)
+            except TransientError as e:
+                # Window is retried as a whole if nothing has been received
+                if not by_time:
+                    raise
+                verbose("Refetching", hours, "hours failed:", e)
+                new_records = None
+            if new_records is None:
+                failed = True
+                continue
+            by_time.update((record_time(data1), data1) for data1 in new_records)
+        now_utc = datetime.now(timezone.utc)
+        gaps = find_gaps(chain(by_time.keys(), hub.missing), start_datetime_utc, num_hours, now_utc - HOUR)
+        if not gaps or failed or retries <= 0:
+            break
+        retries -= 1
+        windows = merge_gaps(gaps, GAP_DISTANCE, GAP_WINDOWS)
+        stats.count("gaps", len(windows))
+        verbose("Missing", sum(n for s, n in gaps), "hours in", len(gaps), "gap(s), refetching with", len(windows), "request(s)")
+
+    records = [ by_time[t] for t in sorted(by_time) ]
+    if failed:
+        if not records:
+            # None = failed, if nothing cached
+            return None
+        warning("request failed, using", len(records), "records only")
+    pending = False
+    if gaps:
+        stats.count("missing", sum(n for s, n in gaps))
+        warning(f"{hub.name}: no data for hour(s):", ", ".join(f"{s.astimezone(hub.timezone):%Y-%m-%d %H:%M} +{n}h" for s, n in gaps))
+        final = int((now_utc - SYNC_DELAY).timestamp())
+        for s, n in gaps:
+            t = int(s.timestamp())
+            if failed or t + n * 3600 > final:
+                pending = True
+            else:
+                hub.missing.update(range(t, t + n * 3600, 3600))
+    start, end = int(start_datetime_utc.timestamp()), int(end_datetime_utc.timestamp())
+    missing = sorted(t for t in hub.missing if start <= t < end)
+    complete = end_datetime_utc <= now_utc and not failed and not pending
+    response_cache.store(id, start_datetime_utc, num_hours, records, complete, missing)
+    return records
+
+
+
+def retrieve_window_hourly(hub, start_datetime_utc, num_hours):
+    # Returns columns for this window (see jdaydecode.decode_hourly) plus local
+    # date/time, doesn't add to csv_output, thus safe to run concurrently for
+    # several windows
+    return run_steps(window_hourly_steps(hub, start_datetime_utc, num_hours), hub.dispatcher.fetch)
+
+
+
+async def retrieve_window_async(engine, hub, start_datetime_utc, num_hours, retries=0):
+    # Async engine: returns columns for this window, same as
+    # retrieve_window_hourly(), windows failed with a transient error are
+    # retried like in retrieve_windows(), None if failed
+    async def fetch(start, hours):
+        r = await engine.get_api(hub.api(), hourly_url(hub, start, hours), headers=HOURLY_HEADERS)
+        return hourly_records(hub, r, r.size)
+
+    window = f"{hub.name} {start_datetime_utc.astimezone(hub.timezone):%Y-%m-%d %H:%M} +{num_hours}h"
+    for attempt in range(retries + 1):
+        try:
+            return await async_run_steps(window_hourly_steps(hub, start_datetime_utc, num_hours), fetch)
+        except TransientError as e:
+            if attempt < retries:
+                delay = retry_delay(attempt, e)
+                verbose(f"retrieving {window} failed: {e}, retrying in {delay:.0f}s")
+                await engine.sleep(delay)
+                continue
+            warning(f"retrieving {window} failed:", e)
+        except Exception as e:
+            warning(f"retrieving {window} failed:", e)
+        return None
+
+
+
+def window_hourly_steps(hub, start_datetime_utc, num_hours):
+    # Columns for this window, generator of the requests, see
+    # retrieve_window_hourly(), windowplanner.WindowDispatcher.steps()
+    end_datetime_utc = start_datetime_utc + timedelta(hours=num_hours)
+    if ic.enabled:
+        ic(hub, start_datetime_utc, end_datetime_utc, num_hours)
+
+    id = hub.id
+    verbose("Collecting", num_hours, "hours starting from:", start_datetime_utc.astimezone(hub.timezone), "(local),", start_datetime_utc, "(UTC)")
+
+    if id[0] == 'Z':
+        records = yield from cached_records_steps(hub, start_datetime_utc, num_hours)
+        if records is None:
+            return None
+        verbose("success - Zappi")
+        # Decode all records at once: UTC time, kWh per hour for import, export,
+        # BEV (from original script, Zappi charging only fills h1d, h2d, h3d)
+        with stats.timer("decode"):
+            cols = decode_hourly(records)
+        stats.count("records", len(records))
+        ## doesn't work for me as generation is always 0, my Zappi can only measure import/export
+        # daily_generation=y_gep/60
+        # daily_self_consumption = daily_generation - daily_export
+        # daily_property_usage=daily_import + daily_self_consumption
+        # daily_green_percentage = (daily_self_consumption / daily_property_usage)*100
+
+        return cols
+    else:
+        print ('Error: unknown ID prefix provided.')
+
+    return None
+
+
+
+def query_window_hourly(store, hub, start_datetime_utc, num_hours):
+    # Returns columns for this window from the database, no retrieval
+    end_datetime_utc = start_datetime_utc + timedelta(hours=num_hours)
+    cols = store.query(hub.id, start_datetime_utc, end_datetime_utc)
+    verbose("Query", hub.name, start_datetime_utc.astimezone(hub.timezone), "(local),", len(cols["time"]), "hours")
+    return cols
+
+
+
+MINUTES_CHUNK_SIZE = 64 * 1024
+
+def retrieve_window_minutes(hub, start_datetime_utc, num_hours):
+    # Returns minute columns for this window within one UTC day (see
+    # jdaystream.decode_minutes), records are decoded while the response is
+    # received, None if the request failed
+    id = hub.id
+    url = "cgi-jday-" + id + '-' + str(start_datetime_utc.year) + '-' + str(start_datetime_utc.month) + '-' + str(start_datetime_utc.day)
+    verbose("URL:", url)
+
+    start = int(start_datetime_utc.timestamp())
+    headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+    with hub.limit:
+        r = hub.api().get_api(url, headers = headers, stream = True)
+        try:
+            if r.status_code != 200:
+                warning("Failed to read minute data, status code", r.status_code, "x-request-id", r.headers.get('x-request-id'), "errors", r.text[:200])
+                return None
+            # Receiving, parsing and decoding are interleaved, timed as decode
+            with stats.timer("decode"):
+                cols = decode_minutes(iter_records(r.iter_content(chunk_size=MINUTES_CHUNK_SIZE)),
+                                      start, start + int(num_hours) * 3600)
+            stats.count("bytes", r.raw.tell())
+            stats.count("records", len(cols["time"]))
+            return cols
+        finally:
+            r.close()
+
+
+
+# Backoff for retrying failed windows, in s
+RETRY_BACKOFF     = 10
+RETRY_BACKOFF_MAX = 120
+
+def retry_delay(attempt, e):
+    # Delay before retrying window after transient error, until the circuit
+    # breaker (or Retry-After) allows requests again, else exponential
+    # backoff with jitter
+    if e.retry_after:
+        return e.retry_after + random.uniform(0, 1)
+    delay = min(RETRY_BACKOFF * 2 ** attempt, RETRY_BACKOFF_MAX)
+    return random.uniform(delay / 2, delay)
+
+
+
+def retrieve_window_delayed(delay, retrieve, hub, start, hours):
+    # Retry queue entry, wait before retrying window
+    time.sleep(delay)
+    return retrieve(hub, start, hours)
+
+
+
+def retrieve_windows(windows, jobs=1, retries=0, retrieve=retrieve_window_hourly, lookahead=None):
+    # Retrieve list of (hub, start UTC, hours) with up to jobs concurrent requests,
+    # yields (hub, start UTC, hours, columns) in the original order, columns=None for failed windows.
+    # Windows failed with a transient error (429, 5xx, timeout, open circuit)
+    # are queued again up to retries times, while the following windows are
+    # still being retrieved, other errors fail at once. With lookahead, at
+    # most this number of windows is retrieved ahead of the consumer, keeping
+    # memory bounded.
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        windows = iter(windows)
+        pending = deque()
+        def submit(n):
+            for hub, start, hours in islice(windows, n):
+                pending.append(((hub, start, hours), pool.submit(retrieve, hub, start, hours)))
+        submit(lookahead)
+        while pending:
+            (hub, start, hours), future = pending.popleft()
+            if lookahead:
+                submit(1)
+            window = f"{hub.name} {start.astimezone(hub.timezone):%Y-%m-%d %H:%M} +{hours}h"
+            for attempt in range(retries + 1):
+                try:
+                    columns = future.result()
+                except TransientError as e:
+                    columns = None
+                    if attempt < retries:
+                        delay = retry_delay(attempt, e)
+                        verbose(f"retrieving {window} failed: {e}, retrying in {delay:.0f}s")
+                        future = pool.submit(retrieve_window_delayed, delay, retrieve, hub, start, hours)
+                        continue
+                    warning(f"retrieving {window} failed:", e)
+                except Exception as e:
+                    warning(f"retrieving {window} failed:", e)
+                    columns = None
+                break
+            yield hub, start, hours, columns
+
+
+
+SYNC_DELAY = timedelta(hours=1)
+
+def query_rollups(store, hub, start_datetime_utc, num_hours, resolution):
+    # Returns rollups of all periods starting within this window from the
+    # database, rollups are rebuilt for data stored without them
+    if not store.has_rollups(hub.id):
+        verbose("Rebuilding rollups for", hub.name)
+        store.rebuild_rollups(hub.id, hub.timezone)
+    first = period_start(local_day(int(start_datetime_utc.timestamp()), hub.timezone), resolution)
+    last  = local_day(int(start_datetime_utc.timestamp()) + num_hours * 3600 - 1, hub.timezone) + 1
+    return store.query_rollups(hub.id, resolution, first, last)
+
+
+
+def rollup_columns(sums):
+    # CSV columns for rollups, local date of period start
+    return [ period_dates(sums["period"]), sums["hours"], sums["import"], sums["export"], sums["bev"] ]
+
+
+
+def output_columns(hub, columns, outputs, times=None):
+    # Add columns to output of hub, with times the UTC times are added as
+    # first column, formatted as local time on write, or right away for
+    # outputs without time column (hubs in different timezones)
+    out, hub_column, time_column = outputs[hub]
+    if times is not None:
+        if not time_column and len(times):
+            with stats.timer("timezone"):
+                times = TZOffsets(hub.timezone, times[0], times[-1] + 1).strftime(times, "%x %X")
+        columns = [ times ] + columns
+    if hub_column:
+        columns = [ [ hub.name ] * len(columns[0]) ] + columns
+    out.add_columns(columns)
+    stats.count("rows", len(columns[0]))
+    with stats.timer("output"):
+        out.flush()
+
+
+
+def fill_gaps(hub, cols, start_datetime_utc, num_hours, value):
+    # Returns columns with added rows for the hours without data in this
+    # window (before the current hour), energy values set to value
+    gaps = find_gaps(cols["time"], start_datetime_utc, num_hours, datetime.now(timezone.utc) - HOUR)
+    if not gaps:
+        return cols
+    times = list(cols["time"])
+    for start, hours in gaps:
+        t = int(start.timestamp())
+        times += range(t, t + hours * 3600, 3600)
+    missing = len(times) - len(cols["time"])
+    stats.count("filled", missing)
+    order = sorted(range(len(times)), key=times.__getitem__)
+    filled = { "time": array('q', (times[i] for i in order)) }
+    for name in COLUMNS[1:]:
+        values = list(cols[name]) + [ value ] * missing
+        filled[name] = array('d', (values[i] for i in order))
+    return filled
+
+
+
+def output_minutes(hub, start, hours, cols, failed, outputs, downsamplers=None, last_windows=None):
+    # Add minute columns of window to CSV output of hub, summed to buckets
+    # with downsamplers (last bucket with the last window of hub), record
+    # failed windows
+    if cols is None:
+        failed.append(f"{hub.name} {start.astimezone(hub.timezone):%Y-%m-%d %H:%M} +{hours}h")
+        return
+    chunks = [ cols ]
+    if downsamplers:
+        chunks = [ downsamplers[hub].add(cols) ]
+        if last_windows[hub] == (start, hours):
+            chunks.append(downsamplers[hub].finish())
+    for cols in chunks:
+        output_minute_columns(hub, cols, outputs)
+
+
+
+def output_minute_columns(hub, cols, outputs):
+    # Add minute columns to CSV output of hub, with local date/time
+    times = cols["time"]
+    if not times:
+        return
+    output_columns(hub, [ cols["import"], cols["export"], cols["bev"] ], outputs, times)
+
+
+
+def output_window(hub, start, hours, cols, failed, outputs, journals=None, hour_utc=None, store=None, accumulators=None, last_windows=None, gap_value=None):
+    # Add columns of window to database and CSV output of hub (hourly or as
+    # rollups, last period with the last window of hub), record failed windows,
+    # record window in sync journal of hub after the output has been written,
+    # hours without data are added to the hourly output with gap_value
+    if cols is None:
+        failed.append(f"{hub.name} {start.astimezone(hub.timezone):%Y-%m-%d %H:%M} +{hours}h")
+        return
+    if store:
+        with stats.timer("db"):
+            store.upsert(hub.id, cols, hub.timezone)
+    times = cols["time"]
+    if accumulators:
+        output_columns(hub, rollup_columns(accumulators[hub].add(cols)), outputs)
+        if last_windows[hub] == (start, hours):
+            output_columns(hub, rollup_columns(accumulators[hub].finish()), outputs)
+    else:
+        if gap_value is not None:
+            cols = fill_gaps(hub, cols, start, hours, gap_value)
+        output_columns(hub, [ cols["import"], cols["export"], cols["bev"] ], outputs, cols["time"])
+    if journals:
+        # Data is complete up to the last record received, hours without
+        # records are accepted as final after SYNC_DELAY
+        complete_utc = hour_utc - SYNC_DELAY
+        if times:
+            complete_utc = max(complete_utc, datetime.fromtimestamp(times[-1], tz=timezone.utc) + timedelta(hours=1))
+        journals[hub].mark_done(start, hours, min(complete_utc, hour_utc))
+
+
+
+def parse_local_datetime(value, tz, end=False):
+    # Parse YYYY-MM, YYYY-MM-DD, YYYY-MM-DDTHH (local time), returns start of
+    # this period, or with end=True start of the next period (exclusive end)
+    m = re.match(r'^(\d\d\d\d)-(\d\d)(?:-(\d\d)(?:[T ](\d\d))?)?$', value)
+    if not m:
+        return None
+    year, month = int(m.group(1)), int(m.group(2))
+    try:
+        if m.group(3) is None:
+            dt = datetime(year, month, 1)
+            if end:
+                dt = datetime(year + (month // 12), (month % 12) + 1, 1)
+        elif m.group(4) is None:
+            dt = datetime(year, month, int(m.group(3)))
+            if end:
+                dt += timedelta(days=1)
+        else:
+            dt = datetime(year, month, int(m.group(3)), int(m.group(4)))
+            if end:
+                dt += timedelta(hours=1)
+    except ValueError:
+        return None
+    return dt.replace(tzinfo=tz)
+
+
+
+def sync_windows(hub, journal, start_utc, end_utc, hour_utc, max_hours):
+    # Windows for incremental sync of hub, from last sync (or start_utc) up to
+    # end_utc or the last complete hour, without windows done by an
+    # interrupted sync
+    if journal.last:
+        start_utc = journal.last
+        verbose("Last sync", hub.name, "up to", start_utc.astimezone(hub.timezone), "(local)")
+    end_utc = min(end_utc, hour_utc) if end_utc else hour_utc
+    if end_utc <= start_utc:
+        verbose("Hub", hub.name, "is up to date")
+        return []
+    windows = plan_windows(start_utc, end_utc, max_hours, local_month_starts(start_utc, end_utc, hub.timezone))
+    return [ (start, hours) for start, hours in windows if not journal.is_done(start, hours) ]
+
+
+
+def hub_filename(filename, hub):
+    # Output file name for single hub, NAME.csv -> NAME-HUB.csv
+    base, ext = os.path.splitext(filename)
+    return f"{base}-{hub.name}{ext}"
+
+
+
+def append_time_key(i, timezones, fmt):
+    # Append key for rows with local time in column i, UTC epoch seconds,
+    # timezones per hub name (row[0]) or None for output without hub column.
+    # The repeated hour at the end of DST is told apart by row order, the
+    # second occurrence follows the first one (last key per hub).
+    last = {}
+    def key(row):
+        name = row[0] if None not in timezones else None
+        local = datetime.strptime(row[i], fmt).replace(tzinfo=timezones[name])
+        t0, t1 = int(local.timestamp()), int(local.replace(fold=1).timestamp())
+        prev = last.get(name)
+        t = t1 if prev is not None and t0 <= prev < t1 else t0
+        last[name] = t
+        return t
+    return key
 
 
 
@@ -207,9 +821,35 @@ def main():
         epilog      = "Version " + VERSION + " / " + AUTHOR)
     arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
     arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
-    arg.add_argument("-s", "--start", help="start YYYY-MM for report (default this month)")
-    arg.add_argument("-e", "--end", help="end YYYY-MM for report (default this month)")
-    arg.add_argument("-o", "--output", help="output CSV file (default MyEnergi_Data.csv)")
+    arg.add_argument("--stats", nargs="?", const="", help="output timers and counters of all phases at the end, optionally also as JSON file")
+    arg.add_argument("-s", "--start", help="start YYYY-MM[-DD[THH]] for report (default this month)")
+    arg.add_argument("-e", "--end", help="end YYYY-MM[-DD[THH]] for report, inclusive (default this month)")
+    arg.add_argument("-o", "--output", help="output file (default MyEnergi_Data.csv, .bin, .parquet, .arrow)")
+    arg.add_argument("-F", "--format", choices=FORMATS.keys(), default="csv", help="output format, binary formats with UTC time column (default csv)")
+    arg.add_argument("-H", "--hub", action="append", help="retrieve hub NAME only (config section [hub:NAME]), can be repeated (default all)")
+    arg.add_argument("--split", action="store_true", help="one output file per hub, NAME-HUB.csv (default combined with Hub column)")
+    arg.add_argument("-S", "--stream", action="store_true", help="write CSV output while retrieving data")
+    arg.add_argument("-a", "--append", action="store_true", help="append new rows to existing CSV output, skipping rows already present")
+    arg.add_argument("--sync", action="store_true", help="incremental sync, retrieve hours since the last sync only, --start for the first sync (journal in cache directory)")
+    arg.add_argument("--daemon", action="store_true", help="run continuously, sync new hours every --interval seconds")
+    arg.add_argument("--interval", type=int, default=DEFAULT_INTERVAL, help=f"daemon: poll interval in s (default {DEFAULT_INTERVAL})")
+    arg.add_argument("-j", "--jobs", type=int, default=1, help="number of requests running concurrently (default 1)")
+    arg.add_argument("--per-hub", type=int, help="max number of concurrent requests per hub (default --jobs)")
+    arg.add_argument("--engine", choices=ENGINES, default="threads", help="threads or asyncio engine for hourly data, async requires aiohttp (default threads)")
+    arg.add_argument("--per-host", type=int, help="async engine: max number of connections per API server (default --jobs)")
+    arg.add_argument("--rate", type=float, default=DEFAULT_RATE, help=f"max requests per second and API server, 0 = unlimited (default {DEFAULT_RATE})")
+    arg.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help=f"number of retries for failed requests and windows (default {DEFAULT_RETRIES})")
+    arg.add_argument("--max-hours", type=int, default=DEFAULT_MAX_HOURS, help=f"max hours per request (default {DEFAULT_MAX_HOURS})")
+    arg.add_argument("--db", nargs="?", const=DEFAULT_DB_FILE, help=f"store hourly data in SQLite database (default {DEFAULT_DB_FILE})")
+    arg.add_argument("-Q", "--query", action="store_true", help="output data from database only, no retrieval")
+    arg.add_argument("-r", "--resolution", choices=RESOLUTIONS, default="hour", help="output hourly data or sums by local day, week, month (default hour)")
+    arg.add_argument("--gaps", choices=GAPS.keys(), default="skip", help="hourly output: hours without data are left out, zero or marked as nan (default skip)")
+    arg.add_argument("-m", "--minutes", type=int, choices=MINUTES, help="minute data from cgi-jday, summed to buckets of N minutes")
+    arg.add_argument("-R", "--refresh", action="store_true", help="ignore cached data, refetch and update cache")
+    arg.add_argument("-N", "--no-cache", action="store_true", help="disable response and director cache")
+    arg.add_argument("--cache-dir", help=f"response cache directory (default {DEFAULT_CACHE_DIR})")
+    arg.add_argument("--director", default=DIRECTOR_URL, help=f"director URL, e.g. http://localhost:8080 for mock-server.py (default {DIRECTOR_URL})")
+    arg.add_argument("--director-ttl", type=int, default=DEFAULT_DIRECTOR_TTL, help=f"time to live for cached API server in s (default {DEFAULT_DIRECTOR_TTL})")
 
     args = arg.parse_args()
 
@@ -218,45 +858,295 @@ def main():
         verbose.set_prog(NAME)
         verbose.enable()
     if args.debug:
-        ic.enable()
+        enable_debug()
+    if args.stats is not None:
+        stats.enable()
     ic(args)
 
     # Additional command line options
-    today = date.today()
-    year_s  = year_e  = today.year
-    month_s = month_e = today.month
-    if args.start:
-        m = re.match(r'^(\d\d\d\d)-(\d\d)$', args.start)
-        if m:
-            year_s = int(m.group(1))
-            month_s = int(m.group(2))
-        else:
-            error("illegal format for --start option:", args.start)
-    if args.end:
-        m = re.match(r'^(\d\d\d\d)-(\d\d)$', args.end)
-        if m:
-            year_e = int(m.group(1))
-            month_e = int(m.group(2))
-        else:
-            error("illegal format for --end option:", args.end)
-    filename = args.output or "MyEnergi_Data.csv"
-    ic(filename, year_s, month_s, year_e, month_e)
+    filename = args.output or "MyEnergi_Data" + FORMATS[args.format]
+    if args.jobs < 1:
+        error("illegal value for --jobs option:", args.jobs)
+    if args.per_hub is None:
+        args.per_hub = args.jobs
+    if args.per_hub < 1:
+        error("illegal value for --per-hub option:", args.per_hub)
+    if args.per_host is None:
+        args.per_host = args.jobs
+    if args.per_host < 1:
+        error("illegal value for --per-host option:", args.per_host)
+    if args.engine == "async" and (args.minutes or args.query):
+        error("--engine async not allowed with --minutes, --query")
+    if args.max_hours < 1:
+        error("illegal value for --max-hours option:", args.max_hours)
+    if args.rate < 0:
+        error("illegal value for --rate option:", args.rate)
+    if args.retries < 0:
+        error("illegal value for --retries option:", args.retries)
+    if args.interval < 1:
+        error("illegal value for --interval option:", args.interval)
+    if args.daemon:
+        if args.end:
+            error("--end not allowed with --daemon")
+        args.sync = True
+    if args.minutes:
+        if args.sync or args.db or args.query or args.resolution != "hour":
+            error("--minutes not allowed with --sync, --daemon, --db, --query, --resolution")
+    if args.format != "csv" and (args.sync or args.append):
+        error("--sync, --daemon, --append require --format csv")
+    if args.sync and args.resolution != "hour":
+        error("--resolution not allowed with --sync or --daemon, use --db for rollups")
+    if args.query:
+        if args.sync:
+            error("--query not allowed with --sync or --daemon")
+        args.db = args.db or DEFAULT_DB_FILE
+        if not os.path.exists(args.db):
+            error("database not found:", args.db)
+    if args.gaps != "skip" and (args.minutes or args.resolution != "hour"):
+        error("--gaps not allowed with --minutes, --resolution")
+    gap_value = GAPS[args.gaps]
+    store = HourStore(args.db) if args.db else None
+    scheduler.configure(rate=args.rate, burst=max(int(args.rate * 2), 1), retries=args.retries)
+    engine = None
+    if args.engine == "async":
+        try:
+            engine = AsyncEngine(args.jobs, args.per_host, args.per_hub)
+        except ImportError as e:
+            error(e)
+    ic(filename, args.jobs, args.max_hours)
+    if args.cache_dir:
+        response_cache.set_dir(args.cache_dir)
+    if args.refresh:
+        response_cache.set_refresh()
+    if args.no_cache or args.sync:
+        # Sync windows are tracked by the journal, no need to cache them
+        response_cache.disable()
+    MyenergiAPI.set_director(args.director)
+    if not args.no_cache:
+        MyenergiAPI.set_director_cache(os.path.join(response_cache.dir, "director.json"), args.director_ttl)
 
     # Actions starts here ...
     Config(".myenergi.cfg")
-    csv_output.add_fields(["Date", "Import (kWh)", "Export (kWh)", "BEV (kWh)"])
+    hubs = Config.hubs
+    if args.hub:
+        hubs = [ hub for hub in Config.hubs if hub.name in args.hub ]
+        unknown = set(args.hub) - set(hub.name for hub in hubs)
+        if unknown:
+            error("unknown hub(s):", ", ".join(sorted(unknown)))
+    ic(hubs)
+
+    # Request windows for all hubs, --start/--end in local time of each hub,
+    # default this month, with --sync incremental from the journal up to the
+    # last complete hour
+    today = date.today().strftime("%Y-%m")
+    hour_utc = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    ranges = {}
+    journals = {}
+    windows = []
+    for hub in hubs:
+        start_local = parse_local_datetime(args.start or today, hub.timezone)
+        if not start_local:
+            error("illegal format for --start option:", args.start)
+        end_local = parse_local_datetime(args.end or today, hub.timezone, end=True)
+        if not end_local:
+            error("illegal format for --end option:", args.end)
+        start_utc = start_local.astimezone(timezone.utc)
+        end_utc   = end_local.astimezone(timezone.utc)
+        if end_utc <= start_utc:
+            error("--end before --start")
+        ic(hub, start_local, end_local, start_utc, end_utc)
+
+        # Connection pool must be large enough for concurrent requests
+        hub.api(pool_size=min(args.jobs, args.per_hub))
+        hub.set_limit(args.per_hub)
+        hub.dispatcher.max_hours = args.max_hours
+        hub.dispatcher.min_hours = min(hub.dispatcher.min_hours, args.max_hours)
+
+        if args.minutes:
+            # One request per UTC day
+            days = [ datetime.combine(start_utc.date() + timedelta(days=i), datetime.min.time(), timezone.utc)
+                     for i in range(1, (end_utc.date() - start_utc.date()).days + 1) ]
+            windows += [ (hub, start, hours) for start, hours in plan_windows(start_utc, end_utc, 24, days) ]
+            continue
+        if args.query and args.resolution != "hour":
+            # Rollups from the database in one go
+            windows.append((hub, start_utc, hours_between(start_utc, end_utc)))
+            continue
+        if args.query:
+            # Query one local month at a time
+            windows += [ (hub, start, hours) for start, hours in plan_windows(start_utc, end_utc, hours_between(start_utc, end_utc), local_month_starts(start_utc, end_utc, hub.timezone)) ]
+            continue
+
+        if args.sync:
+            journals[hub] = SyncJournal(os.path.join(response_cache.dir, f"sync-{hub.id}.json"), start_utc)
+            ranges[hub] = (start_utc, end_utc if args.end else None)
+            windows += [ (hub, start, hours) for start, hours in sync_windows(hub, journals[hub], *ranges[hub], hour_utc, args.max_hours) ]
+            continue
+
+        # Windows aligned with local months, cached windows remain valid with
+        # changing --start/--end, without cache the minimum number of requests
+        boundaries = [] if args.no_cache else local_month_starts(start_utc, end_utc, hub.timezone)
+        windows += [ (hub, start, hours) for start, hours in plan_windows(start_utc, end_utc, args.max_hours, boundaries) ]
+    ic(windows)
+
+    # CSV output, combined with hub column for more than one hub, or one file per hub
+    # Other output formats, same interface as csv_output
+    sink = csv_output
+    if args.format == "packed":
+        sink = packed_output()
+    elif args.format in ("parquet", "arrow"):
+        try:
+            sink = arrow_output(parquet=args.format == "parquet")
+        except ImportError as e:
+            error(e)
+    fields = ["Date", "Import (kWh)", "Export (kWh)", "BEV (kWh)"]
+    types  = ["time", "float", "float", "float"]
+    date_fmt = "%x %X"
+    time_column = True
+    accumulators = None
+    if args.format != "csv" and args.resolution == "hour":
+        # UTC epoch seconds instead of formatted local time
+        fields = ["Time"] + fields[1:]
+    elif not args.split and len(set(str(hub.timezone) for hub in hubs)) > 1:
+        # Combined CSV output of hubs in different timezones, local time
+        # formatted per hub before output
+        types  = ["str"] + types[1:]
+        time_column = False
+    if args.resolution != "hour":
+        # Rollups with number of hours, DST days have 23 or 25 hours
+        fields = ["Date", "Hours"] + fields[1:]
+        types  = ["str", "int"] + types[1:]
+        date_fmt = "%x"
+        if not args.query:
+            accumulators = { hub: RollupAccumulator(hub.timezone, args.resolution) for hub in hubs }
+    last_windows = { hub: (start, hours) for hub, start, hours in windows }
+    outputs = {}
+    for hub in hubs:
+        if args.split:
+            out = sink.new()
+            out.set_time_format(date_fmt, hub.timezone)
+            out.add_fields(fields, types=types)
+            outputs[hub] = (out, False, time_column)
+        elif len(hubs) > 1:
+            outputs[hub] = (sink, True, time_column)
+        else:
+            outputs[hub] = (sink, False, time_column)
+    if not args.split:
+        if hubs:
+            sink.set_time_format(date_fmt, hubs[0].timezone)
+        if len(hubs) > 1:
+            sink.add_fields(["Hub"] + fields, types=["str"] + types)
+        else:
+            sink.add_fields(fields, types=types)
+    files = { out: hub_filename(filename, hub) if args.split else filename  for hub, (out, hub_column, time_column) in outputs.items() }
+    downsamplers = None
+    if args.minutes:
+        # Bounded memory for long ranges
+        args.stream = True
+        if args.minutes > 1:
+            downsamplers = { hub: Downsampler(args.minutes) for hub in hubs }
+    if args.sync:
+        # Journal is updated after each window written, new rows are added to
+        # the existing output
+        args.stream = True
+        args.append = True
+    if args.append:
+        # Rows present in file: same or earlier UTC time, local date for
+        # rollups, per hub for combined output
+        for out in files:
+            out_hubs = [ hub for hub, (o, hub_column, time_column) in outputs.items() if o is out ]
+            hub_column = outputs[out_hubs[0]][1]
+            i = 1 if hub_column else 0
+            if args.resolution == "hour":
+                key = append_time_key(i, { hub.name if hub_column else None: hub.timezone for hub in out_hubs }, date_fmt)
+            else:
+                key = lambda row, i=i: datetime.strptime(row[i], date_fmt)
+            if hub_column:
+                out.set_append_key(key, lambda row: row[0], [ hub.name for hub in out_hubs ])
+            else:
+                out.set_append_key(key)
+    if args.stream:
+        for out, file in files.items():
+            verbose("appending to" if args.append else "streaming to", file)
+            try:
+                out.open(file, append=args.append)
+            except ValueError as e:
+                error(file + ":", e)
+
+    try:
+        while True:
+            failed = []
+            if args.minutes:
+                for hub in hubs:
+                    retrieve_api_server(hub)
+                for hub, start, hours, cols in retrieve_windows(windows, args.jobs, args.retries, retrieve_window_minutes, 2 * args.jobs):
+                    output_minutes(hub, start, hours, cols, failed, outputs, downsamplers, last_windows)
+            elif args.query and args.resolution != "hour":
+                for hub, start, hours in windows:
+                    output_columns(hub, rollup_columns(query_rollups(store, hub, start, hours, args.resolution)), outputs)
+            elif args.query:
+                for hub, start, hours in windows:
+                    output_window(hub, start, hours, query_window_hourly(store, hub, start, hours), failed, outputs, gap_value=gap_value)
+            elif engine:
+                # Director lookups for all hubs concurrently, then all windows
+                for hub, api_server in zip(hubs, engine.run(retrieve_api_server_async, [ (hub,) for hub in hubs ])):
+                    if isinstance(api_server, DirectorError):
+                        error(f"{hub.name}: {api_server}, check serial number and API key")
+                engine.run(retrieve_window_async, [ (hub, start, hours, args.retries) for hub, start, hours in windows ],
+                           lambda job, cols: output_window(*job[:3], cols, failed, outputs, journals, hour_utc, store, accumulators, last_windows, gap_value))
+            else:
+                for hub in hubs:
+                    retrieve_api_server(hub)
+                for hub, start, hours, cols in retrieve_windows(windows, args.jobs, args.retries):
+                    output_window(hub, start, hours, cols, failed, outputs, journals, hour_utc, store, accumulators, last_windows, gap_value)
+            if downsamplers:
+                # Last bucket of hubs with failed last window
+                for hub, down in downsamplers.items():
+                    output_minute_columns(hub, down.finish(), outputs)
+            if accumulators:
+                # Last period of hubs with failed last window
+                for hub, acc in accumulators.items():
+                    output_columns(hub, rollup_columns(acc.finish()), outputs)
+            if failed:
+                warning("no data for window(s):", ", ".join(failed))
+            else:
+                for journal in journals.values():
+                    journal.finish()
+            if not args.daemon:
+                break
+
+            # Daemon: session and API server stay warm, next poll retrieves
+            # the new hours only, hubs up to date don't send any request
+            verbose(f"next poll in {args.interval}s")
+            time.sleep(args.interval)
+            hour_utc = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+            windows = []
+            for hub in hubs:
+                windows += [ (hub, start, hours) for start, hours in sync_windows(hub, journals[hub], *ranges[hub], hour_utc, args.max_hours) ]
+    except KeyboardInterrupt:
+        if not args.daemon:
+            raise
+        verbose("daemon stopped")
 
-    api_server = retrieve_api_server()
-    for year in range(year_s, year_e+1):
-        month1 = month_s if year == year_s else 1
-        month2 = month_e if year == year_e else 12
-        for month in range(month1, month2+1):
-            ic(year, month)
-            retrieve_month_hourly(api_server, year, month)
+    MyenergiAPI.close_all()
+    if store:
+        store.close()
 
-    verbose("saving to", filename)
-    csv_output.write(filename)
+    for out, file in files.items():
+        with stats.timer("output"):
+            if args.stream:
+                out.close()
+            else:
+                verbose("appending to" if args.append else "saving to", file)
+                try:
+                    out.write(file, append=args.append)
+                except ValueError as e:
+                    error(file + ":", e)
 
+    if args.stats is not None:
+        stats.summary()
+        if args.stats:
+            stats.write_json(args.stats)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,398 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from myenergiapi import MyenergiAPI
+#   api = MyenergiAPI.hub(serial, password, pool_size=1)
+#   api.get(url, headers={...})
+#   api.api_server()
+#   api.get_api(path, headers={...})
+#   api.invalidate_api_server()
+#       DirectorError if the director lookup fails, e.g. wrong API key
+#
+# Building blocks for other HTTP clients (e.g. asyncio)
+#   api.cached_api_server()                     from memory or director cache, None if unknown
+#   api.set_api_server(response)                from director response, DirectorError if failed
+#   api.api_url(api_server, path)
+#   MyenergiAPI.set_director_cache(file, ttl=DEFAULT_DIRECTOR_TTL)
+#   MyenergiAPI.set_director(url)               e.g. http://localhost:8080 for mock-server.py
+#   api.close()
+#   MyenergiAPI.close_all()
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       Shared client layer for the Myenergi API, one persistent requests.Session
+#       per hub with digest auth reuse
+# Version 0.2 / 2026-10-17
+#       Director lookup cached on disk with TTL, automatic failover to
+#       re-resolved API server on redirect or connection error
+# Version 0.3 / 2026-10-17
+#       Requests go through requestscheduler (rate limit, retries, circuit breaker)
+# Version 0.4 / 2026-10-17
+#       Close redirect responses, for streamed responses
+# Version 0.5 / 2026-10-17
+#       Director URL configurable, API servers use the same scheme, director
+#       cache entries are valid for the same director only
+# Version 0.6 / 2026-10-17
+#       Stats for director lookups
+# Version 0.7 / 2026-10-17
+#       requests is imported and the session created on the first request
+# Version 0.8 / 2026-10-17
+#       Connection errors after failover raise requestscheduler.TransientError
+# Version 0.9 / 2026-10-17
+#       DirectorError for failed director lookups instead of KeyError
+# Version 0.10 / 2026-10-17
+#       requests imported with requestscheduler._import_requests()
+# Version 0.11 / 2026-10-17
+#       cached_api_server(), set_api_server(), api_url() split from
+#       api_server(), resolve_api_server(), get_api(), for the asyncio engine
+
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Local modules
+from verbose import verbose, stats
+# requests is imported on first use
+from requestscheduler import scheduler, TransientError, _import_requests
+
+VERSION = "0.11 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "myenergiapi"
+
+
+DIRECTOR_URL    = "https://director.myenergi.net"
+DEFAULT_TIMEOUT = 60
+DEFAULT_DIRECTOR_TTL = 24 * 3600
+
+
+
+class DirectorError(OSError):
+    """
+    Director lookup failed, e.g. wrong serial number or API key
+    """
+
+
+
+class MyenergiAPI:
+    """
+    Myenergi API client, one persistent requests.Session per hub
+
+    The session keeps the TCP/TLS connections to the director and API servers
+    alive, it is created on the first request. The HTTPDigestAuth object is shared by all requests, it remembers the
+    negotiated nonce and nonce count (per thread) and thus sends the
+    Authorization header preemptively, saving the 401 challenge round trip.
+    """
+    _hubs = {}                  # serial -> MyenergiAPI
+    _lock = threading.Lock()
+    director_cache = None       # director cache file, None = disabled
+    director_ttl   = DEFAULT_DIRECTOR_TTL
+    director_url   = DIRECTOR_URL
+
+    def __init__(self, serial: str, password: str, pool_size: int=1, timeout: float=DEFAULT_TIMEOUT):
+        """
+        Create API client for hub
+
+        :param serial: hub serial number (digest auth user name)
+        :type serial: str
+        :param password: API key (digest auth password)
+        :type password: str
+        :param pool_size: max number of connections per host, defaults to 1
+        :type pool_size: int, optional
+        :param timeout: request timeout in s, defaults to DEFAULT_TIMEOUT
+        :type timeout: float, optional
+        """
+        self.serial    = serial
+        self.password  = password
+        self.pool_size = pool_size
+        self.timeout   = timeout
+        self._session  = None
+        self._session_lock = threading.Lock()
+        self._api_server   = None
+        self._api_lock     = threading.Lock()
+
+
+    @property
+    def session(self):
+        """
+        Persistent requests.Session with digest auth, created on first use
+
+        :return: session
+        :rtype: requests.Session
+        """
+        with self._session_lock:
+            if self._session is None:
+                requests = _import_requests()
+                session = requests.Session()
+                session.auth = requests.auth.HTTPDigestAuth(self.serial, self.password)
+                session.headers.update({"Accept-Encoding": "gzip"})
+                adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=max(self.pool_size, 1))
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+
+    @classmethod
+    def hub(cls, serial: str, password: str, pool_size: int=1, timeout: float=DEFAULT_TIMEOUT):
+        """
+        Get shared API client for hub, created on first call
+
+        :param serial: hub serial number
+        :type serial: str
+        :param password: API key
+        :type password: str
+        :param pool_size: max number of connections per host (first call only), defaults to 1
+        :type pool_size: int, optional
+        :param timeout: request timeout in s (first call only), defaults to DEFAULT_TIMEOUT
+        :type timeout: float, optional
+        :return: API client
+        :rtype: MyenergiAPI
+        """
+        with cls._lock:
+            api = cls._hubs.get(serial)
+            if not api:
+                api = cls(serial, password, pool_size, timeout)
+                cls._hubs[serial] = api
+            return api
+
+
+    def get(self, url: str, **kwargs) -> "requests.Response":
+        """
+        HTTP GET request using the persistent session
+
+        :param url: URL
+        :type url: str
+        :return: response
+        :rtype: requests.Response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+
+    @classmethod
+    def set_director_cache(cls, file: str, ttl: float=DEFAULT_DIRECTOR_TTL):
+        """
+        Set file for caching director lookups, global for all hubs
+
+        :param file: cache file name, None = disable cache
+        :type file: str
+        :param ttl: time to live for cached API server in s, defaults to DEFAULT_DIRECTOR_TTL
+        :type ttl: float, optional
+        """
+        cls.director_cache = file
+        cls.director_ttl   = ttl
+
+
+    @classmethod
+    def set_director(cls, url: str):
+        """
+        Set director URL, global for all hubs, API servers are accessed with
+        the same scheme (http or https)
+
+        :param url: director URL
+        :type url: str
+        """
+        cls.director_url = url.rstrip("/")
+
+
+    def _load_director_cache(self) -> dict:
+        """
+        Internal, read director cache file
+
+        :return: serial -> { "asn": api_server, "time": timestamp }
+        :rtype: dict
+        """
+        try:
+            with open(MyenergiAPI.director_cache, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+    def _store_director_cache(self, api_server: str):
+        """
+        Internal, update director cache file, None removes entry for this hub
+
+        :param api_server: API server or None
+        :type api_server: str
+        """
+        file = MyenergiAPI.director_cache
+        if not file:
+            return
+        with MyenergiAPI._lock:
+            cache = self._load_director_cache()
+            if api_server:
+                cache[self.serial] = { "asn": api_server, "time": time.time(), "director": MyenergiAPI.director_url }
+            else:
+                cache.pop(self.serial, None)
+            dir = os.path.dirname(file) or "."
+            os.makedirs(dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp, file)
+
+
+    def resolve_api_server(self) -> str:
+        """
+        Query director for API server of this hub, update cache
+
+        :raises TransientError: request failed after all retries, or connection error
+        :raises DirectorError: lookup failed
+        :return: API server host name
+        :rtype: str
+        """
+        # Based on code snippet from https://myenergi.info/viewtopic.php?p=29050#p29050, user DougieL
+        director = MyenergiAPI.director_url
+        verbose("Director:", director)
+        requests = _import_requests()
+        with stats.timer("director"):
+            try:
+                response = scheduler.call(urlsplit(director).hostname, self.get, director)
+            except requests.ConnectionError as e:
+                raise TransientError(f"{director}: {e}") from e
+        verbose(response)
+        return self.set_api_server(response)
+
+
+    def set_api_server(self, response) -> str:
+        """
+        Set API server of this hub from director response, update cache
+
+        :param response: director response, with status_code and headers
+        :type response: requests.Response
+        :raises DirectorError: lookup failed
+        :return: API server host name
+        :rtype: str
+        """
+        api_server = response.headers.get('X_MYENERGI-asn')
+        if response.status_code != 200 or not api_server:
+            raise DirectorError(f"director lookup for hub {self.serial} failed, status {response.status_code}")
+        self._api_server = api_server
+        self._store_director_cache(api_server)
+        return api_server
+
+
+    def cached_api_server(self) -> str:
+        """
+        Get API server of this hub from memory or director cache, without
+        director lookup
+
+        :return: API server host name, None if unknown
+        :rtype: str
+        """
+        if self._api_server:
+            return self._api_server
+        if MyenergiAPI.director_cache:
+            entry = self._load_director_cache().get(self.serial)
+            if (entry and time.time() - entry["time"] < MyenergiAPI.director_ttl
+                and entry.get("director", DIRECTOR_URL) == MyenergiAPI.director_url):
+                verbose("API server (cached):", entry["asn"])
+                self._api_server = entry["asn"]
+                return self._api_server
+        return None
+
+
+    def api_server(self) -> str:
+        """
+        Get API server of this hub, from memory, director cache, or director lookup
+
+        :return: API server host name
+        :rtype: str
+        """
+        with self._api_lock:
+            return self.cached_api_server() or self.resolve_api_server()
+
+
+    def api_url(self, api_server: str, path: str) -> str:
+        """
+        URL on API server, same scheme as director
+
+        :param api_server: API server host name
+        :type api_server: str
+        :param path: URL path without leading /
+        :type path: str
+        :return: URL
+        :rtype: str
+        """
+        return urlsplit(MyenergiAPI.director_url).scheme + "://" + api_server + "/" + path
+
+
+    def invalidate_api_server(self):
+        """
+        Forget API server of this hub, next api_server() call queries director
+        """
+        with self._api_lock:
+            verbose("Invalidating API server:", self._api_server)
+            self._api_server = None
+            self._store_director_cache(None)
+
+
+    def get_api(self, path: str, **kwargs) -> "requests.Response":
+        """
+        HTTP GET request to API server of this hub, re-resolves API server and
+        retries once on redirect or connection error. Rate limiting, retries
+        on 429/5xx/timeouts, and circuit breaker per API server are handled by
+        the request scheduler.
+
+        :param path: URL path without leading /
+        :type path: str
+        :raises TransientError: request failed after all retries, or connection error
+        :return: response
+        :rtype: requests.Response
+        """
+        requests = _import_requests()
+        kwargs.setdefault("allow_redirects", False)
+        for retry in (False, True):
+            api_server = self.api_server()
+            try:
+                r = scheduler.call(api_server, self.get, self.api_url(api_server, path), **kwargs)
+            except requests.ConnectionError as e:
+                if retry:
+                    raise TransientError(f"{api_server}: {e}") from e
+                self.invalidate_api_server()
+                continue
+            if r.is_redirect and not retry:
+                r.close()
+                self.invalidate_api_server()
+                continue
+            return r
+
+
+    def close(self):
+        """
+        Close session and remove from shared clients
+        """
+        with MyenergiAPI._lock:
+            if MyenergiAPI._hubs.get(self.serial) is self:
+                del MyenergiAPI._hubs[self.serial]
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+    @classmethod
+    def close_all(cls):
+        """
+        Close all shared clients
+        """
+        for api in list(cls._hubs.values()):
+            api.close()
@@ -0,0 +1,438 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from requestscheduler import scheduler, TransientError, CircuitOpenError
+#   scheduler.configure(rate=DEFAULT_RATE, burst=DEFAULT_BURST, retries=DEFAULT_RETRIES, ...)
+#   response = scheduler.call(host, func, *args, **kwargs)
+#       func returns requests.Response, retried with exponential backoff and
+#       jitter on 429, 5xx and timeouts, rate limited per host, raises
+#       TransientError after the last retry, fails fast with
+#       CircuitOpenError (a TransientError) if host failed repeatedly
+#   e.retry_after                               s until worth retrying, None = unknown
+#
+# Building blocks of call(), for other request loops (e.g. asyncio)
+#   bucket, breaker = scheduler.limits(host)
+#   scheduler.allow(host, breaker)              raises CircuitOpenError
+#   wait = bucket.take()                        0 = token taken, else s to wait
+#   delay = scheduler.failed(host, breaker, attempt, response=r)    or error=e
+#       s until next attempt, raises TransientError after the last retry
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       Request scheduler with token bucket rate limiting, retries with
+#       exponential backoff and jitter, circuit breaker per host
+# Version 0.2 / 2026-10-17
+#       Close responses before retrying, for streamed responses
+# Version 0.3 / 2026-10-17
+#       Stats for requests, retries and HTTP wait time
+# Version 0.4 / 2026-10-17
+#       requests is imported on first call, CircuitOpenError is an OSError
+#       (base class of requests.RequestException)
+# Version 0.5 / 2026-10-17
+#       TransientError after the last retry on 429, 5xx and timeouts,
+#       instead of returning the error response, with retry_after from the
+#       Retry-After header or the open circuit breaker
+# Version 0.6 / 2026-10-17
+#       requests imported with _import_requests(), same as myenergiapi
+# Version 0.7 / 2026-10-17
+#       _import_requests() returns the module, also used by myenergiapi
+# Version 0.8 / 2026-10-17
+#       limits(), allow(), failed() and TokenBucket.take() as building
+#       blocks for the asyncio engine
+
+import random
+import threading
+import time
+import typing
+
+# Local modules
+from verbose import verbose, warning, stats
+
+VERSION = "0.8 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "requestscheduler"
+
+
+DEFAULT_RATE          = 4.0     # requests per second and host
+DEFAULT_BURST         = 8
+DEFAULT_RETRIES       = 3
+DEFAULT_BACKOFF       = 1.0     # s, base for exponential backoff
+DEFAULT_BACKOFF_MAX   = 60.0    # s
+DEFAULT_FAILURES      = 5       # consecutive failures opening the circuit
+DEFAULT_RESET_TIMEOUT = 60.0    # s until next trial request
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# Imported on first use, see _import_requests()
+requests = None
+
+
+
+def _import_requests():
+    """
+    Internal, import requests (and urllib3, charset_normalizer, idna ...) on
+    first use, saves startup time for runs without any request
+
+    :return: requests module
+    """
+    global requests
+    if requests is None:
+        import requests
+    return requests
+
+
+
+class TransientError(OSError):
+    """
+    Request failed after all retries (429, 5xx, timeout), might succeed later
+    """
+
+    def __init__(self, message: str, retry_after: float=None):
+        """
+        Create exception
+
+        :param message: error message
+        :type message: str
+        :param retry_after: time in s until worth retrying, defaults to None (unknown)
+        :type retry_after: float, optional
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+
+class CircuitOpenError(TransientError):
+    """
+    Host failed repeatedly, requests are rejected until reset timeout
+    """
+
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """
+        Create token bucket, initially full
+
+        :param rate: tokens per second, 0 = unlimited
+        :type rate: float
+        :param burst: bucket size
+        :type burst: int
+        """
+        self.rate   = rate
+        self.burst  = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.time   = time.monotonic()
+        self._lock  = threading.Lock()
+
+
+    def take(self) -> float:
+        """
+        Take one token, if available
+
+        :return: 0 if taken, else time in s until available
+        :rtype: float
+        """
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.time) * self.rate)
+            self.time = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+    def acquire(self):
+        """
+        Take one token, wait until available
+        """
+        while True:
+            wait = self.take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker: opens after a number of consecutive failures, allows a
+    single trial request after the reset timeout (half open), closes again
+    on success
+    """
+
+    def __init__(self, failures: int, reset_timeout: float):
+        """
+        Create circuit breaker, initially closed
+
+        :param failures: consecutive failures opening the circuit
+        :type failures: int
+        :param reset_timeout: time in s until trial request
+        :type reset_timeout: float
+        """
+        self.failures      = failures
+        self.reset_timeout = reset_timeout
+        self.count         = 0
+        self.opened        = None       # time opened, None = closed
+        self._lock         = threading.Lock()
+
+
+    def allow(self) -> bool:
+        """
+        Check whether request is allowed
+
+        :return: allowed
+        :rtype: bool
+        """
+        with self._lock:
+            if self.opened is None:
+                return True
+            if time.monotonic() - self.opened >= self.reset_timeout:
+                # Half open, one trial request, others wait for next timeout
+                self.opened = time.monotonic()
+                return True
+            return False
+
+
+    def remaining(self) -> float:
+        """
+        Time until the next trial request
+
+        :return: time in s, 0 if closed
+        :rtype: float
+        """
+        with self._lock:
+            if self.opened is None:
+                return 0.0
+            return max(self.reset_timeout - (time.monotonic() - self.opened), 0.0)
+
+
+    def success(self):
+        """
+        Record successful request, closes circuit
+        """
+        with self._lock:
+            self.count  = 0
+            self.opened = None
+
+
+    def failure(self):
+        """
+        Record failed request, opens circuit after too many failures
+        """
+        with self._lock:
+            self.count += 1
+            if self.count >= self.failures:
+                if self.opened is None:
+                    warning(f"too many failures, pausing requests for {self.reset_timeout:.0f}s")
+                self.opened = time.monotonic()
+
+
+
+class RequestScheduler:
+    """
+    Request scheduler, rate limiting, retries and circuit breaker per host
+    """
+
+    def __init__(self):
+        """
+        Create request scheduler with default settings
+        """
+        self.configure()
+        self.retry_count = 0            # total number of retries
+        self._hosts = {}                # host -> (TokenBucket, CircuitBreaker)
+        self._lock  = threading.Lock()
+
+
+    def configure(self, rate: float=DEFAULT_RATE, burst: int=DEFAULT_BURST, retries: int=DEFAULT_RETRIES,
+                  backoff: float=DEFAULT_BACKOFF, backoff_max: float=DEFAULT_BACKOFF_MAX,
+                  failures: int=DEFAULT_FAILURES, reset_timeout: float=DEFAULT_RESET_TIMEOUT):
+        """
+        Set scheduler parameters, applies to hosts not used yet
+
+        :param rate: requests per second and host, 0 = unlimited, defaults to DEFAULT_RATE
+        :type rate: float, optional
+        :param burst: max burst of requests, defaults to DEFAULT_BURST
+        :type burst: int, optional
+        :param retries: max number of retries, defaults to DEFAULT_RETRIES
+        :type retries: int, optional
+        :param backoff: base delay in s for exponential backoff, defaults to DEFAULT_BACKOFF
+        :type backoff: float, optional
+        :param backoff_max: max delay in s, defaults to DEFAULT_BACKOFF_MAX
+        :type backoff_max: float, optional
+        :param failures: consecutive failures opening the circuit, defaults to DEFAULT_FAILURES
+        :type failures: int, optional
+        :param reset_timeout: time in s until trial request, defaults to DEFAULT_RESET_TIMEOUT
+        :type reset_timeout: float, optional
+        """
+        self.rate          = rate
+        self.burst         = burst
+        self.retries       = retries
+        self.backoff       = backoff
+        self.backoff_max   = backoff_max
+        self.failures      = failures
+        self.reset_timeout = reset_timeout
+
+
+    def limits(self, host: str) -> tuple:
+        """
+        Token bucket and circuit breaker for host
+
+        :param host: host name
+        :type host: str
+        :return: (TokenBucket, CircuitBreaker)
+        :rtype: tuple
+        """
+        with self._lock:
+            entry = self._hosts.get(host)
+            if not entry:
+                entry = self._hosts[host] = (TokenBucket(self.rate, self.burst),
+                                             CircuitBreaker(self.failures, self.reset_timeout))
+            return entry
+
+
+    def _delay(self, attempt: int, response: "requests.Response"=None) -> float:
+        """
+        Internal, backoff delay, Retry-After header or exponential with full jitter
+
+        :param attempt: number of attempt, 0 = first retry
+        :type attempt: int
+        :param response: response, defaults to None
+        :type response: requests.Response, optional
+        :return: delay in s
+        :rtype: float
+        """
+        if response is not None:
+            retry_after = self._retry_after(response)
+            if retry_after is not None:
+                return retry_after
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+
+    def _retry_after(self, response: "requests.Response") -> float:
+        """
+        Internal, delay from Retry-After header (seconds only)
+
+        :param response: response
+        :type response: requests.Response
+        :return: delay in s, at most backoff_max, None if no header
+        :rtype: float
+        """
+        try:
+            return min(float(response.headers["Retry-After"]), self.backoff_max)
+        except (KeyError, ValueError):
+            return None
+
+
+    def allow(self, host: str, breaker: CircuitBreaker):
+        """
+        Check circuit breaker of host before request
+
+        :param host: host name
+        :type host: str
+        :param breaker: circuit breaker of host, see limits()
+        :type breaker: CircuitBreaker
+        :raises CircuitOpenError: host failed repeatedly
+        """
+        if not breaker.allow():
+            raise CircuitOpenError(f"{host}: too many failures, circuit open", breaker.remaining())
+
+
+    def failed(self, host: str, breaker: CircuitBreaker, attempt: int, response: "requests.Response"=None,
+               error: Exception=None) -> float:
+        """
+        Record failed request, timeout (error) or status in RETRY_STATUS
+        (response, closed)
+
+        :param host: host name
+        :type host: str
+        :param breaker: circuit breaker of host, see limits()
+        :type breaker: CircuitBreaker
+        :param attempt: number of attempt, 0 = first request
+        :type attempt: int
+        :param response: response, defaults to None
+        :type response: requests.Response, optional
+        :param error: timeout exception, defaults to None
+        :type error: Exception, optional
+        :raises TransientError: last retry failed
+        :return: delay in s before next attempt
+        :rtype: float
+        """
+        breaker.failure()
+        if response is None:
+            if attempt >= self.retries:
+                raise TransientError(f"{host}: {error}") from error
+            delay = self._delay(attempt)
+            verbose(f"{host}: {error}, retry in {delay:.1f}s")
+        else:
+            if attempt >= self.retries:
+                response.close()
+                raise TransientError(f"{host}: status {response.status_code}, x-request-id {response.headers.get('x-request-id')}",
+                                     self._retry_after(response))
+            delay = self._delay(attempt, response)
+            verbose(f"{host}: status {response.status_code}, retry in {delay:.1f}s")
+            # Release connection, response body might not have been read
+            response.close()
+        with self._lock:
+            self.retry_count += 1
+        stats.count("retries")
+        return delay
+
+
+    def call(self, host: str, func: typing.Callable, *args, **kwargs) -> "requests.Response":
+        """
+        Call request function with rate limiting, retries and circuit breaker
+
+        :param host: host name
+        :type host: str
+        :param func: request function, returns requests.Response
+        :type func: typing.Callable
+        :raises TransientError: 429, 5xx or timeout after the last retry
+        :raises CircuitOpenError: host failed repeatedly
+        :return: response, status not in RETRY_STATUS
+        :rtype: requests.Response
+        """
+        _import_requests()
+        bucket, breaker = self.limits(host)
+        attempt = 0
+        while True:
+            self.allow(host, breaker)
+            bucket.acquire()
+            stats.count("requests")
+            try:
+                with stats.timer("http"):
+                    r = func(*args, **kwargs)
+            except requests.Timeout as e:
+                delay = self.failed(host, breaker, attempt, error=e)
+            else:
+                if r.status_code not in RETRY_STATUS:
+                    breaker.success()
+                    return r
+                delay = self.failed(host, breaker, attempt, response=r)
+            attempt += 1
+            time.sleep(delay)
+
+
+
+# Global object
+scheduler = RequestScheduler()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from responsecache import response_cache
+#   response_cache.set_dir(dir=DEFAULT_CACHE_DIR)
+#   response_cache.enable(flag=True)
+#   response_cache.disable()
+#   response_cache.set_refresh(flag=True)
+#   records, complete, missing = response_cache.load(id, start_utc, num_hours)
+#   response_cache.store(id, start_utc, num_hours, records, complete, missing)
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       On-disk cache for cgi-jdayhour records, one gzip'ed JSON file per
+#       hub id and UTC window
+# Version 0.2 / 2026-10-17
+#       Hours known to be missing stored with the records
+
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime
+
+VERSION = "0.2 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "responsecache"
+
+
+DEFAULT_CACHE_DIR = ".myenergi-cache"
+
+class ResponseCache:
+    """
+    On-disk cache for API response records
+    """
+
+    def __init__(self, dir: str=DEFAULT_CACHE_DIR):
+        """
+        Create response cache object
+
+        :param dir: cache directory, defaults to DEFAULT_CACHE_DIR
+        :type dir: str, optional
+        """
+        self.dir     = dir
+        self.enabled = True
+        self.refresh = False     # ignore cached data, but store new responses
+
+
+    def set_dir(self, dir: str=DEFAULT_CACHE_DIR):
+        """
+        Set cache directory
+
+        :param dir: cache directory, defaults to DEFAULT_CACHE_DIR
+        :type dir: str, optional
+        """
+        self.dir = dir
+
+
+    def enable(self, flag: bool=True):
+        """
+        Enable (default) or disable (flag=False) cache
+
+        :param flag: enable flag, defaults to True
+        :type flag: bool, optional
+        """
+        self.enabled = flag
+
+
+    def disable(self):
+        """
+        Disable cache, neither load nor store
+        """
+        self.enabled = False
+
+
+    def set_refresh(self, flag: bool=True):
+        """
+        Set refresh mode, cached data is ignored, new data still stored
+
+        :param flag: refresh flag, defaults to True
+        :type flag: bool, optional
+        """
+        self.refresh = flag
+
+
+    def _path(self, id: str, start_utc: datetime, num_hours: int) -> str:
+        """
+        Internal, cache file path for hub id and UTC window
+
+        :param id: hub id
+        :type id: str
+        :param start_utc: start of window (UTC)
+        :type start_utc: datetime
+        :param num_hours: length of window in hours
+        :type num_hours: int
+        :return: file path
+        :rtype: str
+        """
+        name = f"{start_utc:%Y-%m-%d-%H}-{int(num_hours)}.json.gz"
+        return os.path.join(self.dir, id, name)
+
+
+    def load(self, id: str, start_utc: datetime, num_hours: int) -> tuple:
+        """
+        Load cached records for hub id and UTC window
+
+        :param id: hub id
+        :type id: str
+        :param start_utc: start of window (UTC)
+        :type start_utc: datetime
+        :param num_hours: length of window in hours
+        :type num_hours: int
+        :return: (records, complete, missing hours), (None, False, []) if not cached
+        :rtype: tuple
+        """
+        if not self.enabled or self.refresh:
+            return None, False, []
+        try:
+            with gzip.open(self._path(id, start_utc, num_hours), "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None, False, []
+        return data["records"], data["complete"], data.get("missing", [])
+
+
+    def store(self, id: str, start_utc: datetime, num_hours: int, records: list, complete: bool, missing: list=()):
+        """
+        Store records for hub id and UTC window
+
+        :param id: hub id
+        :type id: str
+        :param start_utc: start of window (UTC)
+        :type start_utc: datetime
+        :param num_hours: length of window in hours
+        :type num_hours: int
+        :param records: records from API response
+        :type records: list
+        :param complete: window is closed, records won't change anymore
+        :type complete: bool
+        :param missing: UTC epoch seconds of hours known to be missing, not requested again, defaults to ()
+        :type missing: list, optional
+        """
+        if not self.enabled:
+            return
+        path = self._path(id, start_utc, num_hours)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to temp file first, replace atomically
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                json.dump({ "complete": complete, "records": records, "missing": list(missing) }, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+
+# Global object
+response_cache = ResponseCache()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from rollups import rollup, RollupAccumulator, RESOLUTIONS
+#   sums = rollup(columns, tz, resolution)      columns as returned by jdaydecode.decode_hourly()
+#   sums["period"]              local day number (days since 1970-01-01) of period start, array('q')
+#   sums["hours"]               number of hours in period, array('q')
+#   sums["import"]              kWh, array('d')
+#   sums["export"]
+#   sums["generation"]
+#   sums["bev"]
+#   acc = RollupAccumulator(tz, resolution)
+#   sums = acc.add(columns)                     completed periods, columns in time order
+#   sums = acc.finish()                         last period
+#   period_dates(periods, fmt="%x")             formatted local dates
+#   local_day(t, tz)                            local day number of UTC epoch seconds
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       Rollups of hourly data by local day, week (starting Monday) and month,
+#       DST aware, uses NumPy if available
+# Version 0.2 / 2026-10-17
+#       NumPy is imported on first use
+# Version 0.3 / 2026-10-17
+#       NumPy imported with jdaydecode._import_numpy()
+
+from array import array
+from datetime import datetime, timedelta, timezone, tzinfo
+
+# Local modules
+# NumPy is optional, pure Python fallback if not installed, imported on first
+# use with _import_numpy()
+from jdaydecode import days_from_civil, _import_numpy
+from tzoffsets import TZOffsets, DAY, EPOCH
+
+VERSION = "0.3 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "rollups"
+
+
+RESOLUTIONS = ("hour", "day", "week", "month")
+SUMS        = ("import", "export", "generation", "bev")
+COLUMNS     = ("period", "hours") + SUMS
+
+
+
+def civil_from_days(z):
+    """
+    Proleptic Gregorian date for days since 1970-01-01, works with int and
+    NumPy int arrays alike (H. Hinnant's algorithm, inverse of days_from_civil)
+
+    :param z: days since epoch
+    :return: (year, month, day)
+    """
+    z   = z + 719468
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp  = (5 * doy + 2) // 153
+    d   = doy - (153 * mp + 2) // 5 + 1
+    m   = mp + 3 - 12 * (mp >= 10)
+    y   = yoe + era * 400 + (m <= 2)
+    return y, m, d
+
+
+def period_start(day, resolution: str):
+    """
+    Local day number of the start of the period containing day, works with
+    int and NumPy int arrays alike
+
+    :param day: local day number
+    :param resolution: "day", "week" or "month"
+    :type resolution: str
+    :return: local day number of period start
+    """
+    if resolution == "day":
+        return day
+    if resolution == "week":
+        # 1970-01-01 was a Thursday
+        return day - (day + 3) % 7
+    if resolution == "month":
+        y, m, d = civil_from_days(day)
+        return day - d + 1
+    raise ValueError(f"rollups: unknown resolution {resolution}")
+
+
+def next_period(day: int, resolution: str) -> int:
+    """
+    Local day number of the start of the next period
+
+    :param day: local day number of period start
+    :type day: int
+    :param resolution: "day", "week" or "month"
+    :type resolution: str
+    :return: local day number
+    :rtype: int
+    """
+    if resolution == "day":
+        return day + 1
+    if resolution == "week":
+        return day + 7
+    y, m, d = civil_from_days(day)
+    return days_from_civil(y + (m // 12), (m % 12) + 1, 1)
+
+
+def local_day_utc(day: int, tz: tzinfo) -> datetime:
+    """
+    UTC datetime of local midnight (or the first hour after a DST gap)
+
+    :param day: local day number
+    :type day: int
+    :param tz: timezone
+    :type tz: tzinfo
+    :return: UTC datetime
+    :rtype: datetime
+    """
+    return (EPOCH + timedelta(days=day)).replace(tzinfo=tz).astimezone(timezone.utc)
+
+
+def local_day(t: int, tz: tzinfo) -> int:
+    """
+    Local day number of UTC timestamp
+
+    :param t: UTC epoch seconds
+    :type t: int
+    :param tz: timezone
+    :type tz: tzinfo
+    :return: local day number
+    :rtype: int
+    """
+    return (t + int(datetime.fromtimestamp(t, tz=tz).utcoffset().total_seconds())) // DAY
+
+
+def period_dates(periods: list, fmt: str="%x") -> list:
+    """
+    Format local day numbers as dates
+
+    :param periods: local day numbers
+    :type periods: list
+    :param fmt: strftime() format, defaults to "%x"
+    :type fmt: str, optional
+    :return: formatted dates
+    :rtype: list
+    """
+    return [ (EPOCH + timedelta(days=day)).strftime(fmt) for day in periods ]
+
+
+def empty_rollup() -> dict:
+    """
+    Empty rollup columns
+
+    :return: name -> column (array)
+    :rtype: dict
+    """
+    return { name: array('q' if name in ("period", "hours") else 'd') for name in COLUMNS }
+
+
+def _rollup_python(days: list, columns: dict, resolution: str) -> dict:
+    """
+    Internal, pure Python rollup, single pass, hours in time order
+
+    :param days: local day numbers of hours
+    :type days: list
+    :param columns: hourly columns
+    :type columns: dict
+    :param resolution: "day", "week" or "month"
+    :type resolution: str
+    :return: rollup columns
+    :rtype: dict
+    """
+    sums = empty_rollup()
+    index = {}
+    starts = {}
+    for i, day in enumerate(days):
+        p = starts.get(day)
+        if p is None:
+            p = starts[day] = period_start(day, resolution)
+        j = index.get(p)
+        if j is None:
+            j = index[p] = len(sums["period"])
+            sums["period"].append(p)
+            sums["hours"].append(0)
+            for name in SUMS:
+                sums[name].append(0.0)
+        sums["hours"][j] += 1
+        for name in SUMS:
+            sums[name][j] += columns[name][i]
+    return sums
+
+
+def _rollup_numpy(days: list, columns: dict, resolution: str) -> dict:
+    """
+    Internal, NumPy rollup, grouping and summation on whole columns
+
+    :param days: local day numbers of hours
+    :type days: list
+    :param columns: hourly columns
+    :type columns: dict
+    :param resolution: "day", "week" or "month"
+    :type resolution: str
+    :return: rollup columns
+    :rtype: dict
+    """
+    np = _import_numpy()
+    periods, inverse = np.unique(period_start(np.asarray(days, dtype=np.int64), resolution), return_inverse=True)
+    sums = { "period": array('q', periods.astype(np.int64).tobytes()),
+             "hours":  array('q', np.bincount(inverse).astype(np.int64).tobytes()) }
+    for name in SUMS:
+        values = np.frombuffer(columns[name], dtype=np.float64) if isinstance(columns[name], array) else np.asarray(columns[name], dtype=np.float64)
+        sums[name] = array('d', np.bincount(inverse, weights=values, minlength=len(periods)).tobytes())
+    return sums
+
+
+def rollup(columns: dict, tz: tzinfo, resolution: str) -> dict:
+    """
+    Sum hourly columns by local period, see module usage
+
+    :param columns: hourly columns, see jdaydecode.decode_hourly()
+    :type columns: dict
+    :param tz: timezone
+    :type tz: tzinfo
+    :param resolution: "day", "week" or "month"
+    :type resolution: str
+    :return: name -> column (array), sorted by period
+    :rtype: dict
+    """
+    times = columns["time"]
+    if not len(times):
+        return empty_rollup()
+    offsets = TZOffsets(tz, min(times), max(times) + 1)
+    days = [ local // DAY for local in offsets.to_local(times) ]
+    if _import_numpy():
+        return _rollup_numpy(days, columns, resolution)
+    return _rollup_python(days, columns, resolution)
+
+
+
+class RollupAccumulator:
+    """
+    Rollups over consecutive chunks of hourly data, e.g. request windows,
+    periods spanning several chunks are merged. The last period is held back
+    until data of a later period arrives.
+    """
+
+    def __init__(self, tz: tzinfo, resolution: str):
+        """
+        Create accumulator
+
+        :param tz: timezone
+        :type tz: tzinfo
+        :param resolution: "day", "week" or "month"
+        :type resolution: str
+        """
+        self.tz         = tz
+        self.resolution = resolution
+        self._pending   = None        # last period, list of values in COLUMNS order
+
+
+    def add(self, columns: dict) -> dict:
+        """
+        Add hourly data, chunks in time order
+
+        :param columns: hourly columns
+        :type columns: dict
+        :return: rollup columns of completed periods
+        :rtype: dict
+        """
+        sums = rollup(columns, self.tz, self.resolution)
+        if not len(sums["period"]):
+            return sums
+        rows = [ list(row) for row in zip(*[ sums[name] for name in COLUMNS ]) ]
+        if self._pending:
+            if self._pending[0] == rows[0][0]:
+                rows[0] = [ rows[0][0] ] + [ a + b for a, b in zip(self._pending[1:], rows[0][1:]) ]
+            else:
+                rows.insert(0, self._pending)
+        self._pending = rows.pop()
+        return self._columns(rows)
+
+
+    def finish(self) -> dict:
+        """
+        No more data, return last period
+
+        :return: rollup columns
+        :rtype: dict
+        """
+        rows = [ self._pending ] if self._pending else []
+        self._pending = None
+        return self._columns(rows)
+
+
+    def _columns(self, rows: list) -> dict:
+        """
+        Internal, rows to rollup columns
+
+        :param rows: rows in COLUMNS order
+        :type rows: list
+        :return: rollup columns
+        :rtype: dict
+        """
+        sums = empty_rollup()
+        for row in rows:
+            for name, v in zip(COLUMNS, row):
+                sums[name].append(v)
+        return sums
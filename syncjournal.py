@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from syncjournal import SyncJournal
+#   journal = SyncJournal(file, start_utc=None)    start_utc = start of first sync
+#   journal.last                                UTC datetime, end of last complete hour synced
+#   journal.is_done(start_utc, num_hours)
+#   journal.mark_done(start_utc, num_hours, complete_utc)
+#   journal.finish()
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       Checkpoint journal for incremental, resumable sync
+# Version 0.2 / 2026-10-17
+#       First sync starts at start_utc, last only advances over contiguous
+#       completed windows, also windows completed out of order
+
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+VERSION = "0.2 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "syncjournal"
+
+
+
+class SyncJournal:
+    """
+    Sync journal for one hub, JSON file with the end of the last complete hour
+    synced and the windows completed by an unfinished sync run. The journal is
+    saved after every window, thus an interrupted sync resumes exactly where it
+    stopped.
+    """
+
+    def __init__(self, file: str, start_utc: datetime=None):
+        """
+        Create journal, load from file if existing
+
+        :param file: journal file name
+        :type file: str
+        :param start_utc: start of first sync, if no journal file, defaults to None
+        :type start_utc: datetime, optional
+        """
+        self.file = file
+        self.last = start_utc   # UTC datetime, exclusive end of complete hours
+        self.done = set()       # (start epoch, hours)
+        try:
+            with open(file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("last") is not None:
+            self.last = datetime.fromtimestamp(data["last"], tz=timezone.utc)
+        self.done = set(tuple(w) for w in data.get("done", []))
+
+
+    def save(self):
+        """
+        Write journal file, replaced atomically
+        """
+        dir = os.path.dirname(self.file) or "."
+        os.makedirs(dir, exist_ok=True)
+        data = { "last": int(self.last.timestamp()) if self.last else None,
+                 "done": sorted(self.done) }
+        fd, tmp = tempfile.mkstemp(dir=dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.file)
+
+
+    def is_done(self, start_utc: datetime, num_hours: int) -> bool:
+        """
+        Check whether window was completed by an unfinished sync run
+
+        :param start_utc: start of window
+        :type start_utc: datetime
+        :param num_hours: window size
+        :type num_hours: int
+        :return: window done
+        :rtype: bool
+        """
+        return (int(start_utc.timestamp()), int(num_hours)) in self.done
+
+
+    def mark_done(self, start_utc: datetime, num_hours: int, complete_utc: datetime):
+        """
+        Record completed window and save journal
+
+        :param start_utc: start of window
+        :type start_utc: datetime
+        :param num_hours: window size
+        :type num_hours: int
+        :param complete_utc: data is complete up to this time (exclusive), e.g. current hour
+        :type complete_utc: datetime
+        """
+        end_utc = min(start_utc + timedelta(hours=num_hours), complete_utc)
+        if end_utc == start_utc + timedelta(hours=num_hours):
+            self.done.add((int(start_utc.timestamp()), int(num_hours)))
+        # Advance only if contiguous, then over windows completed before
+        if self.last is None or start_utc <= self.last:
+            last = int(max(self.last or end_utc, end_utc).timestamp())
+            for start, hours in sorted(self.done):
+                if start <= last < start + hours * 3600:
+                    last = start + hours * 3600
+            self.last = datetime.fromtimestamp(last, tz=timezone.utc)
+        self.save()
+
+
+    def finish(self):
+        """
+        Sync run completed, forget completed windows, keep last hour
+        """
+        self.done = set()
+        self.save()
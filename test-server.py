@@ -17,22 +17,23 @@
 # ChangeLog
 # Version 0.0 / 2024-01-12
 #       Find server for Myenergi API
+# Version 0.1 / 2026-10-17
+#       Use director lookup from module myenergiapi, -c --cached option
+# Version 0.2 / 2026-10-17
+#       New option --director, e.g. for mock-server.py
+# Version 0.3 / 2026-10-17
+#       icecream imported with --debug only
 
 import argparse
-import pytz
 from configparser import ConfigParser
-import requests
-from requests.auth import HTTPDigestAuth
 
-# The following libs must be installed with pip
-from icecream import ic
-# Disable debugging
-ic.disable()
 # Local modules
 from verbose import verbose
+from myenergiapi import MyenergiAPI, DIRECTOR_URL
+from responsecache import DEFAULT_CACHE_DIR
 
 global VERSION, AUTHOR, NAME
-VERSION = "0.0 / 2024-01-12"
+VERSION = "0.3 / 2026-10-17"
 AUTHOR  = "Martin Junius"
 NAME    = "test-server"
 
@@ -45,6 +46,8 @@ def main():
         epilog      = "Version " + VERSION + " / " + AUTHOR)
     arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
     arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-c", "--cached", action="store_true", help="use director cache like myenergi-zappi2")
+    arg.add_argument("--director", default=DIRECTOR_URL, help=f"director URL (default {DIRECTOR_URL})")
     # arg.add_argument("-n", "--name", help="example option name")
     # arg.add_argument("-i", "--int", type=int, help="example option int")
     # arg.add_argument("dirname", help="directory name")
@@ -57,9 +60,8 @@ def main():
         verbose.set_prog(NAME)
         verbose.enable()
     if args.debug:
-        ic.enable()
-
-    ic(args)
+        from icecream import ic
+        ic(args)
 
     # Read .ini file for secrets, same format as used by the pymyenergi library with some additions
     #
@@ -74,16 +76,15 @@ def main():
     config.read("./.myenergi.cfg")
     username = config.get("hub", "serial")
     password = config.get("hub", "password")
-    id       = config.get("hub", "id")
-    timezone = pytz.timezone(config.get("hub", "timezone"))
     verbose("Serial number", username)
 
-    # Based on code snippet from https://myenergi.info/viewtopic.php?p=29050#p29050, user DougieL
-    director_url = "https://director.myenergi.net"
-    verbose("Director:", director_url)
-    response = requests.get(director_url, auth=HTTPDigestAuth(username, password))
-    verbose(response)
-    api_server = response.headers['X_MYENERGI-asn']
+    MyenergiAPI.set_director(args.director)
+    api = MyenergiAPI.hub(username, password)
+    if args.cached:
+        MyenergiAPI.set_director_cache(DEFAULT_CACHE_DIR + "/director.json")
+        api_server = api.api_server()
+    else:
+        api_server = api.resolve_api_server()
 
     print("API server:", api_server)
 
@@ -17,6 +17,8 @@
 # ChangeLog
 # Version 0.0 / 2024-07-21
 #       Test timezone handling zoneinfo ./. pytz
+# Version 0.1 / 2026-10-17
+#       Compare tzoffsets.TZOffsets with astimezone() for DST switch
 
 import sys
 import argparse
@@ -33,6 +35,8 @@ import pytz
 from icecream import ic
 # Disable debugging
 ic.enable()
+# Local modules
+from tzoffsets import TZOffsets
 
 tzname = "Europe/Berlin"
 # DST switch end of Mar, end of Oct
@@ -57,6 +61,14 @@ utc2 = dt2.astimezone(utc)
 udelta = utc2 - utc1
 ic(utc1, utc2, udelta, udelta.total_seconds()/3600)
 
+ic("--- precomputed offset table, same result as astimezone() ---")
+offsets = TZOffsets(loc, int(utc1.timestamp()), int(utc2.timestamp()))
+ic(offsets._times, offsets._offsets)
+# hours around DST switch 2024-03-31 02:00 local
+hours = [ int(datetime(2024, 3, 31, h, tzinfo=utc).timestamp()) for h in range(0, 3) ]
+ic([ datetime.fromtimestamp(t, tz=utc).astimezone(loc).strftime("%x %X") for t in hours ])
+ic(offsets.strftime(hours, "%x %X"))
+
 ic("--- behavior with pytz, does result in absolute delta! ---")
 loc = pytz.timezone(tzname)
 utc = pytz.utc
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from tzoffsets import TZOffsets
+#   offsets = TZOffsets(tz, start, end)         start, end = UTC epoch seconds
+#   offsets.offset(t)                           UTC offset in s
+#   offsets.to_local(times)                     local wall clock epoch seconds
+#   offsets.strftime(times, fmt="%x %X")        formatted local times
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       Precomputed UTC offset table for a time range, bulk conversion and
+#       formatting of UTC epoch seconds to local time
+# Version 0.2 / 2026-10-17
+#       Formatted date and time of day parts cached across calls and
+#       instances, per-call caches made short windows slower than plain
+#       datetime.strftime()
+
+import locale
+import re
+from bisect import bisect_right
+from datetime import datetime, timedelta, tzinfo
+
+VERSION = "0.2 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "tzoffsets"
+
+
+DAY   = 86400
+EPOCH = datetime(1970, 1, 1)
+
+# strftime() directives depending only on the date or only on the time of day
+_DATE_DIRECTIVES = set("aAbBCdDeFgGhjmuUVwWxyY")
+_TIME_DIRECTIVES = set("HIklMpPrRSTX")
+_DIRECTIVE       = re.compile(r'%(.)')
+
+# Formatted date and time of day parts, shared by all instances, see
+# _format_caches(), time of day caches are bounded by DAY entries
+_CACHE_DAYS = 10000
+_caches     = {}
+
+
+
+class TZOffsets:
+    """
+    UTC offset table for timezone and time range
+
+    Timezone transitions are determined once for the whole range, converting
+    UTC timestamps to local time is then a bisect lookup and an addition,
+    instead of a datetime.astimezone() call for every single timestamp.
+    """
+
+    def __init__(self, tz: tzinfo, start: int, end: int):
+        """
+        Create offset table, transitions are searched day by day
+
+        :param tz: timezone
+        :type tz: tzinfo
+        :param start: start of range, UTC epoch seconds
+        :type start: int
+        :param end: end of range, UTC epoch seconds
+        :type end: int
+        """
+        self.tz = tz
+        self._times   = [ start ]                       # start of segments
+        self._offsets = [ self._utcoffset(start) ]      # UTC offset within segments
+        t = start
+        while t < end:
+            t_next = min(t + DAY, end)
+            offset = self._utcoffset(t_next)
+            if offset != self._offsets[-1]:
+                # Bisect transition to the second, at most one per day
+                lo, hi = t, t_next
+                while hi - lo > 1:
+                    mid = (lo + hi) // 2
+                    if self._utcoffset(mid) == offset:
+                        hi = mid
+                    else:
+                        lo = mid
+                self._times.append(hi)
+                self._offsets.append(offset)
+            t = t_next
+
+
+    def _utcoffset(self, t: int) -> int:
+        """
+        Internal, UTC offset of timezone at UTC timestamp
+
+        :param t: UTC epoch seconds
+        :type t: int
+        :return: offset in s
+        :rtype: int
+        """
+        return int(datetime.fromtimestamp(t, tz=self.tz).utcoffset().total_seconds())
+
+
+    def offset(self, t: int) -> int:
+        """
+        UTC offset at UTC timestamp, timestamps before the range use the
+        offset at its start
+
+        :param t: UTC epoch seconds
+        :type t: int
+        :return: offset in s
+        :rtype: int
+        """
+        return self._offsets[max(bisect_right(self._times, t) - 1, 0)]
+
+
+    def to_local(self, times: list) -> list:
+        """
+        Convert UTC timestamps to local wall clock epoch seconds
+
+        :param times: UTC epoch seconds
+        :type times: list
+        :return: local wall clock epoch seconds
+        :rtype: list
+        """
+        if len(self._times) == 1:
+            offset = self._offsets[0]
+            return [ t + offset for t in times ]
+        bounds, offsets = self._times, self._offsets
+        return [ t + offsets[max(bisect_right(bounds, t) - 1, 0)] for t in times ]
+
+
+    def strftime(self, times: list, fmt: str="%x %X") -> list:
+        """
+        Format UTC timestamps as local time, same result as
+        datetime.fromtimestamp(t, tz).strftime(fmt)
+
+        If the format consists of a date part followed by a time part (like
+        "%x %X"), both parts are formatted once per day and once per time of
+        day only.
+
+        :param times: UTC epoch seconds
+        :type times: list
+        :param fmt: strftime() format, defaults to "%x %X"
+        :type fmt: str, optional
+        :return: formatted local times
+        :rtype: list
+        """
+        split = _split_format(fmt)
+        if split is None:
+            # Timezone related or mixed directives, no shortcut
+            tz = self.tz
+            return [ datetime.fromtimestamp(t, tz=tz).strftime(fmt) for t in times ]
+
+        date_fmt, time_fmt = split
+        date_cache, time_cache = _format_caches(date_fmt, time_fmt)
+        if len(date_cache) > _CACHE_DAYS:
+            date_cache.clear()
+        result = []
+        append = result.append
+        for local in self.to_local(times):
+            day, secs = divmod(local, DAY)
+            d = date_cache.get(day)
+            if d is None:
+                d = date_cache[day] = (EPOCH + timedelta(days=day)).strftime(date_fmt)
+            s = time_cache.get(secs)
+            if s is None:
+                s = time_cache[secs] = (EPOCH + timedelta(seconds=secs)).strftime(time_fmt)
+            append(d + s)
+        return result
+
+
+
+def _format_caches(date_fmt: str, time_fmt: str) -> tuple:
+    """
+    Internal, caches for formatted date and time of day parts, per format
+    and LC_TIME locale
+
+    :param date_fmt: strftime() date format
+    :type date_fmt: str
+    :param time_fmt: strftime() time format
+    :type time_fmt: str
+    :return: (date cache, time cache), dicts day -> str, seconds -> str
+    :rtype: tuple
+    """
+    key = (locale.setlocale(locale.LC_TIME), date_fmt, time_fmt)
+    caches = _caches.get(key)
+    if caches is None:
+        caches = _caches[key] = ({}, {})
+    return caches
+
+
+
+def _split_format(fmt: str) -> tuple:
+    """
+    Internal, split strftime() format into date and time part
+
+    :param fmt: strftime() format
+    :type fmt: str
+    :return: (date format, time format), None if not possible
+    :rtype: tuple
+    """
+    split = 0
+    seen_time = False
+    for m in _DIRECTIVE.finditer(fmt):
+        c = m.group(1)
+        if c == "%":
+            continue
+        if c in _DATE_DIRECTIVES and not seen_time:
+            split = m.end()
+        elif c in _TIME_DIRECTIVES:
+            seen_time = True
+        else:
+            return None
+    return fmt[:split], fmt[split:]
+
@@ -28,8 +28,13 @@
 #       Added docstrings
 # Version 1.3 / 2024-12-16
 #       Added message(), just like print(), but can be disabled
+# Version 1.4 / 2026-10-17
+#       Added stats, timers and counters for phases, a flag check only if
+#       disabled
+# Version 1.5 / 2026-10-17
+#       Removed stats.iter_count(), not used anymore
 #
-#       Usage:  from verbose import message, verbose, warning, error
+#       Usage:  from verbose import message, verbose, warning, error, stats
 #               message(print-like-args)
 #               verbose(print-like-args)
 #               warning(print-like-args)
@@ -39,11 +44,22 @@
 #               .enabled
 #               .set_prog(name)         global for all objects
 #               .set_errno(errno)       relevant only for error()
+#
+#               stats.enable()
+#               with stats.timer(name):     add elapsed time to timer
+#               stats.count(name, n=1)      add to counter
+#               stats.summary()             output table
+#               stats.report()              dict with timers and counters
+#               stats.write_json(file)
 
 import argparse
+import json
 import sys
+import threading
+import time
+from contextlib import nullcontext
 
-VERSION = "1.3 / 2024-12-16"
+VERSION = "1.5 / 2026-10-17"
 AUTHOR  = "Martin Junius"
 NAME    = "verbose"
 
@@ -129,10 +145,156 @@ class Verbose:
         sys.exit(Verbose.errno)
 
 
+
+
+class _Timer:
+    """
+    Internal, context manager adding elapsed time to timer of stats object
+    """
+
+    def __init__(self, stats, name: str):
+        self.stats = stats
+        self.name  = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NO_TIMER = nullcontext()
+
+
+
+class Stats(Verbose):
+    """
+    Class for statistics objects, timers and counters for phases of the
+    program. Timers of concurrent threads are summed up and thus may exceed
+    the elapsed time. If disabled, all methods return after checking the
+    enabled flag.
+    """
+
+    def __init__(self, flag: bool=False, prefix: str=None):
+        """
+        Create stats object
+
+        :param flag: enable flag, defaults to False
+        :type flag: bool, optional
+        :param prefix: output prefix (in addition to program name), defaults to None
+        :type prefix: str, optional
+        """
+        super().__init__(flag, prefix)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Clear all timers and counters, restart elapsed time
+        """
+        self.timers   = {}          # name -> [count, total s]
+        self.counters = {}          # name -> value
+        self.start    = time.perf_counter()
+
+    def enable(self, flag: bool=True):
+        """
+        Enable (default) or disable (flag=False) stats, restart elapsed time
+
+        :param flag: enable flag, defaults to True
+        :type flag: bool, optional
+        """
+        super().enable(flag)
+        self.start = time.perf_counter()
+
+    def timer(self, name: str):
+        """
+        Context manager measuring the elapsed time of the with block
+
+        :param name: timer name
+        :type name: str
+        :return: context manager
+        """
+        if not self.enabled:
+            return _NO_TIMER
+        return _Timer(self, name)
+
+    def add_time(self, name: str, seconds: float):
+        """
+        Add time to timer
+
+        :param name: timer name
+        :type name: str
+        :param seconds: time in s
+        :type seconds: float
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            t = self.timers.setdefault(name, [0, 0.0])
+            t[0] += 1
+            t[1] += seconds
+
+    def count(self, name: str, n: int=1):
+        """
+        Add to counter
+
+        :param name: counter name
+        :type name: str
+        :param n: value, defaults to 1
+        :type n: int, optional
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self) -> dict:
+        """
+        Get elapsed time, timers and counters
+
+        :return: { "elapsed": s, "timers": { name: { "count": n, "total": s } }, "counters": { name: value } }
+        :rtype: dict
+        """
+        with self._lock:
+            return { "elapsed":  round(time.perf_counter() - self.start, 6),
+                     "timers":   { name: { "count": n, "total": round(t, 6) } for name, (n, t) in self.timers.items() },
+                     "counters": dict(self.counters) }
+
+    def summary(self):
+        """
+        Output timers and counters as table
+        """
+        if not self.enabled:
+            return
+        r = self.report()
+        self(f"{'phase':<12} {'count':>8} {'total s':>10} {'mean ms':>10}")
+        for name, t in r["timers"].items():
+            self(f"{name:<12} {t['count']:>8} {t['total']:>10.3f} {t['total'] / t['count'] * 1000:>10.3f}")
+        for name, value in r["counters"].items():
+            self(f"{name:<12} {value:>8}")
+        self(f"{'elapsed':<12} {'':>8} {r['elapsed']:>10.3f}")
+
+    def write_json(self, file: str):
+        """
+        Write timers and counters to JSON file
+
+        :param file: file name
+        :type file: str
+        """
+        if not self.enabled:
+            return
+        with open(file, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+
 message = Verbose(True)
 verbose = Verbose()
 warning = Verbose(True, "WARNING")
 error   = Verbose(True, "ERROR", True)
+stats   = Stats()
 
 
 
@@ -0,0 +1,416 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from windowplanner import plan_windows, local_month_starts, find_gaps, WindowDispatcher, run_steps
+#   boundaries = local_month_starts(start_utc, end_utc, tz)
+#   start_utc, num_hours = local_month_window(t_utc, tz)
+#   windows = plan_windows(start_utc, end_utc, max_hours, boundaries)
+#   gaps = find_gaps(times, start_utc, num_hours, limit_utc)
+#   windows = merge_gaps(gaps, distance, max_windows)
+#   dispatcher = WindowDispatcher(fetch, max_hours, min_hours)
+#   records = dispatcher.retrieve(start_utc, num_hours)
+#       fetch(start_utc, num_hours) returns records, None if failed, raises
+#       WindowRejectedError if the server rejects the window size
+#   steps = dispatcher.steps(start_utc, num_hours)
+#       same as generator, yields (start_utc, num_hours) requests, receives
+#       the records with send(), WindowRejectedError with throw()
+#   records = run_steps(steps, fetch)           records = generator return value
+
+# ChangeLog
+# Version 0.1 / 2026-10-17
+#       Request window planner for the cgi-jdayhour hour limit, dispatcher
+#       shrinking the window size if the server rejects or truncates responses
+# Version 0.2 / 2026-10-17
+#       find_gaps(), missing hours of a window as minimal request windows
+# Version 0.3 / 2026-10-17
+#       Windows are only split if the server rejects the window size
+#       (WindowRejectedError), other failures are passed up, the max window
+#       size isn't reduced for responses ending early
+# Version 0.4 / 2026-10-17
+#       merge_gaps(), fewer request windows for gaps close to each other
+# Version 0.5 / 2026-10-17
+#       local_month_window(), local month containing a UTC time
+# Version 0.6 / 2026-10-17
+#       WindowDispatcher.steps() and run_steps(), the dispatcher logic as
+#       generator of requests, for blocking and asyncio fetch functions
+
+import math
+import threading
+import typing
+from datetime import datetime, timedelta, timezone, tzinfo
+
+# Local modules
+from verbose import verbose
+from jdaydecode import record_time
+
+VERSION = "0.6 / 2026-10-17"
+AUTHOR  = "Martin Junius"
+NAME    = "windowplanner"
+
+
+##MJ: API only allows a certain numbe of hours, 9999 was too much
+# 745 hours (31 days + DST switch) is known to work
+DEFAULT_MAX_HOURS = 745
+DEFAULT_MIN_HOURS = 24
+# Gaps closer than this are requested together, max requests for the gaps
+# of one window
+DEFAULT_GAP_DISTANCE = 24
+DEFAULT_GAP_WINDOWS  = 2
+
+HOUR = timedelta(hours=1)
+
+
+
+class WindowRejectedError(ValueError):
+    """
+    Server rejected the request window, e.g. too many hours
+    """
+
+
+
+def hours_between(start_utc: datetime, end_utc: datetime) -> int:
+    """
+    Number of hours between two UTC datetimes, rounded up
+
+    :param start_utc: start
+    :type start_utc: datetime
+    :param end_utc: end
+    :type end_utc: datetime
+    :return: hours
+    :rtype: int
+    """
+    # Always calculate ABSOLUTE delta using UTC, otherwise DST switching incurs a wrong result!
+    return math.ceil((end_utc - start_utc).total_seconds() / 3600)
+
+
+def local_month_starts(start_utc: datetime, end_utc: datetime, tz: tzinfo) -> list:
+    """
+    Start of local months within UTC range, as UTC datetimes
+
+    :param start_utc: start of range
+    :type start_utc: datetime
+    :param end_utc: end of range
+    :type end_utc: datetime
+    :param tz: local timezone
+    :type tz: tzinfo
+    :return: UTC datetimes of local month starts, start < t < end
+    :rtype: list
+    """
+    local = start_utc.astimezone(tz)
+    year, month = local.year, local.month
+    starts = []
+    while True:
+        year, month = year + (month // 12), (month % 12) + 1
+        t = datetime(year, month, 1, tzinfo=tz).astimezone(timezone.utc)
+        if t >= end_utc:
+            return starts
+        starts.append(t)
+
+
+def local_month_window(t_utc: datetime, tz: tzinfo) -> tuple:
+    """
+    Window of the local month containing UTC time
+
+    :param t_utc: UTC time
+    :type t_utc: datetime
+    :param tz: local timezone
+    :type tz: tzinfo
+    :return: (start_utc, num_hours)
+    :rtype: tuple
+    """
+    local = t_utc.astimezone(tz)
+    year, month = local.year, local.month
+    start_utc = datetime(year, month, 1, tzinfo=tz).astimezone(timezone.utc)
+    year, month = year + (month // 12), (month % 12) + 1
+    end_utc = datetime(year, month, 1, tzinfo=tz).astimezone(timezone.utc)
+    return start_utc, hours_between(start_utc, end_utc)
+
+
+def plan_windows(start_utc: datetime, end_utc: datetime, max_hours: int=DEFAULT_MAX_HOURS, boundaries: list=()) -> list:
+    """
+    Split UTC range into request windows of at most max_hours, windows never
+    span one of the boundaries (e.g. local month starts, to keep the windows
+    stable for the response cache)
+
+    :param start_utc: start of range
+    :type start_utc: datetime
+    :param end_utc: end of range
+    :type end_utc: datetime
+    :param max_hours: max window size, defaults to DEFAULT_MAX_HOURS
+    :type max_hours: int, optional
+    :param boundaries: UTC datetimes splitting the range, defaults to ()
+    :type boundaries: list, optional
+    :return: list of (start UTC, number of hours)
+    :rtype: list
+    """
+    windows = []
+    points = [ start_utc ] + sorted(b for b in boundaries if start_utc < b < end_utc) + [ end_utc ]
+    for t1, t2 in zip(points, points[1:]):
+        hours = hours_between(t1, t2)
+        while hours > 0:
+            n = min(hours, max_hours)
+            windows.append((t1, n))
+            t1 += timedelta(hours=n)
+            hours -= n
+    return windows
+
+
+def find_gaps(times: typing.Iterable, start_utc: datetime, num_hours: int, limit_utc: datetime=None) -> list:
+    """
+    Find hours without records in UTC window, using a bitmap of the expected
+    hours, contiguous missing hours are combined to one request window
+
+    :param times: UTC epoch seconds of records
+    :type times: typing.Iterable
+    :param start_utc: start of window
+    :type start_utc: datetime
+    :param num_hours: window size
+    :type num_hours: int
+    :param limit_utc: no records expected from this time on, e.g. current hour, defaults to None
+    :type limit_utc: datetime, optional
+    :return: list of (start UTC, number of hours)
+    :rtype: list
+    """
+    n = int(num_hours)
+    if limit_utc is not None:
+        n = max(min(n, hours_between(start_utc, limit_utc)), 0)
+    start   = int(start_utc.timestamp())
+    present = bytearray(n)
+    for t in times:
+        i = (t - start) // 3600
+        if 0 <= i < n:
+            present[i] = 1
+    gaps = []
+    i = present.find(0)
+    while i >= 0:
+        j = present.find(1, i)
+        if j < 0:
+            j = n
+        gaps.append((start_utc + timedelta(hours=i), j - i))
+        i = present.find(0, j)
+    return gaps
+
+
+def merge_gaps(gaps: list, distance: int=DEFAULT_GAP_DISTANCE, max_windows: int=DEFAULT_GAP_WINDOWS) -> list:
+    """
+    Combine gaps to request windows, gaps less than distance hours apart are
+    merged, if there are still more than max_windows, a single window spans
+    all gaps
+
+    :param gaps: list of (start UTC, number of hours), in time order
+    :type gaps: list
+    :param distance: min hours between gaps requested separately, defaults to DEFAULT_GAP_DISTANCE
+    :type distance: int, optional
+    :param max_windows: max number of windows, defaults to DEFAULT_GAP_WINDOWS
+    :type max_windows: int, optional
+    :return: list of (start UTC, number of hours)
+    :rtype: list
+    """
+    windows = []
+    for start, hours in gaps:
+        if windows:
+            prev_start, prev_hours = windows[-1]
+            if hours_between(prev_start, start) - prev_hours < distance:
+                windows[-1] = (prev_start, hours_between(prev_start, start) + hours)
+                continue
+        windows.append((start, hours))
+    if len(windows) > max_windows:
+        first_start = windows[0][0]
+        last_start, last_hours = windows[-1]
+        windows = [ (first_start, hours_between(first_start, last_start) + last_hours) ]
+    return windows
+
+
+
+class WindowDispatcher:
+    """
+    Dispatch request windows to a fetch function, adapting the window size
+
+    If the server rejects the window size, the first half is tried, halving
+    it again until accepted. The max window size is then reduced accordingly
+    for all further windows. If the records of a response end before the end
+    of the window (and before the current hour), the rest of the window is
+    requested separately.
+    """
+
+    def __init__(self, fetch: typing.Callable, max_hours: int=DEFAULT_MAX_HOURS, min_hours: int=DEFAULT_MIN_HOURS):
+        """
+        Create dispatcher
+
+        :param fetch: fetch(start_utc, num_hours) returns list of records, None if failed, raises WindowRejectedError
+        :type fetch: typing.Callable
+        :param max_hours: max window size, defaults to DEFAULT_MAX_HOURS
+        :type max_hours: int, optional
+        :param min_hours: min window size when shrinking, defaults to DEFAULT_MIN_HOURS
+        :type min_hours: int, optional
+        """
+        self.fetch     = fetch
+        self.max_hours = max_hours
+        self.min_hours = min_hours
+        self._lock     = threading.Lock()
+
+
+    def _shrink(self, hours: int):
+        """
+        Internal, reduce max window size
+
+        :param hours: new max window size
+        :type hours: int
+        """
+        with self._lock:
+            if hours < self.max_hours:
+                verbose("Reducing max window size to", hours, "hours")
+                self.max_hours = hours
+
+
+    def retrieve(self, start_utc: datetime, num_hours: int) -> list:
+        """
+        Retrieve records for window, splitting it as necessary
+
+        :param start_utc: start of window
+        :type start_utc: datetime
+        :param num_hours: window size
+        :type num_hours: int
+        :return: records, None if failed
+        :rtype: list
+        """
+        return run_steps(self.steps(start_utc, num_hours), self.fetch)
+
+
+    def steps(self, start_utc: datetime, num_hours: int) -> typing.Generator:
+        """
+        Request steps for window, splitting it as necessary. Generator
+        yielding (start_utc, num_hours) requests, the records are passed
+        back with send(), a rejected window size with
+        throw(WindowRejectedError), see run_steps()
+
+        :param start_utc: start of window
+        :type start_utc: datetime
+        :param num_hours: window size
+        :type num_hours: int
+        :return: records, None if failed
+        :rtype: typing.Generator
+        """
+        num_hours = int(num_hours)
+        if num_hours > self.max_hours:
+            records = []
+            for s, n in plan_windows(start_utc, start_utc + timedelta(hours=num_hours), self.max_hours):
+                part = yield from self.steps(s, n)
+                if part is None:
+                    return None
+                records += part
+            return records
+
+        try:
+            records = yield start_utc, num_hours
+        except WindowRejectedError as e:
+            verbose("Window of", num_hours, "hours rejected:", e)
+            return (yield from self._halved_steps(start_utc, num_hours))
+        if records is None:
+            return None
+        return (yield from self._complete_steps(start_utc, num_hours, records))
+
+
+    def _halved_steps(self, start_utc: datetime, num_hours: int) -> typing.Generator:
+        """
+        Internal, window size rejected, halve the first part of the window
+        until accepted, give up at min_hours
+
+        :param start_utc: start of window
+        :type start_utc: datetime
+        :param num_hours: window size
+        :type num_hours: int
+        :return: records, None if failed
+        :rtype: typing.Generator
+        """
+        half = num_hours
+        while True:
+            half //= 2
+            if half < self.min_hours:
+                return None
+            try:
+                first = yield start_utc, half
+                break
+            except WindowRejectedError:
+                pass
+        if first is None:
+            return None
+        self._shrink(half)
+        first = yield from self._complete_steps(start_utc, half, first)
+        rest  = yield from self.steps(start_utc + timedelta(hours=half), num_hours - half)
+        return None if rest is None else first + rest
+
+
+    def _complete_steps(self, start_utc: datetime, num_hours: int, records: list) -> typing.Generator:
+        """
+        Internal, request rest of window for truncated response
+
+        :param start_utc: start of window
+        :type start_utc: datetime
+        :param num_hours: window size
+        :type num_hours: int
+        :param records: records received
+        :type records: list
+        :return: records for the complete window
+        :rtype: typing.Generator
+        """
+        while records:
+            end_utc  = start_utc + timedelta(hours=num_hours)
+            # Current hour might not be available yet
+            limit    = min(end_utc, datetime.now(timezone.utc) - HOUR)
+            next_utc = datetime.fromtimestamp(record_time(records[-1]), tz=timezone.utc) + HOUR
+            if next_utc >= limit:
+                break
+            rest_hours = hours_between(next_utc, end_utc)
+            verbose("Response ends at", next_utc, "(UTC), requesting remaining", rest_hours, "hours")
+            try:
+                rest = yield next_utc, rest_hours
+            except WindowRejectedError:
+                rest = None
+            if not rest or record_time(rest[-1]) < next_utc.timestamp():
+                # No more data available for this window
+                break
+            # Missing records at the end are not necessarily truncation,
+            # the max window size stays the same
+            start_utc, num_hours = next_utc, rest_hours
+            records = records + rest
+        return records
+
+
+
+def run_steps(steps: typing.Generator, fetch: typing.Callable):
+    """
+    Run request steps, see WindowDispatcher.steps(), with blocking fetch
+    function, exceptions raised by fetch are thrown into the generator
+
+    :param steps: generator yielding (start_utc, num_hours) requests
+    :type steps: typing.Generator
+    :param fetch: fetch(start_utc, num_hours) returns records, None if failed, raises WindowRejectedError
+    :type fetch: typing.Callable
+    :return: return value of generator
+    """
+    try:
+        request = next(steps)
+        while True:
+            try:
+                result = fetch(*request)
+            except Exception as e:
+                request = steps.throw(e)
+            else:
+                request = steps.send(result)
+    except StopIteration as stop:
+        return stop.value